@@ -1,46 +1,126 @@
 import os
-import json
+import asyncio
+import functools
+import contextvars
+import weakref
+from contextlib import asynccontextmanager
+import httpx
+import orjson
 import requests
-from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Callable, Dict, Any, Optional, Tuple
+from .semantic_cache import SemanticCache
+
+# httpx client shared by the coroutines running inside AsyncAIClient.async_session()
+_async_session: contextvars.ContextVar[Optional[httpx.AsyncClient]] = contextvars.ContextVar(
+    '_async_session', default=None
+)
+
+@functools.lru_cache(maxsize=4096)
+def _fallback_kind(prompt: str) -> str:
+    """Memoized keyword dispatch for AIClient._fallback_analysis"""
+    prompt_lower = prompt.lower()
+    for kind in ('priority', 'deadline', 'category', 'tags'):
+        if kind in prompt_lower:
+            return kind
+    return ''
+
+@functools.lru_cache(maxsize=1)
+def _get_openai_module():
+    """Import and configure the openai SDK on first use only"""
+    import openai
+    openai.api_key = os.getenv('OPENAI_API_KEY')
+    return openai
 
 class AIClient:
+    # Shared by every client in the process so cached responses outlive a request
+    cache = SemanticCache(path=os.getenv('AI_CACHE_PATH'))
+    
     def __init__(self):
         self.openai_key = os.getenv('OPENAI_API_KEY')
         self.anthropic_key = os.getenv('ANTHROPIC_API_KEY')
         self.gemini_key = os.getenv('GEMINI_API_KEY')
         self.lm_studio_url = os.getenv('LM_STUDIO_URL', 'http://localhost:1234/v1')
         
+        # Keep-alive connection pool so repeated calls skip the TCP/TLS handshake
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=50,
+            max_retries=Retry(total=2, backoff_factor=0.2)
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        weakref.finalize(self, self.session.close)
+        
+        # Identical prompts skip the round-trip entirely; failures raise and are not memoized
+        self._analyze_cached = functools.lru_cache(maxsize=4096)(self._analyze_uncached)
+    
     def call_lm_studio(self, prompt: str, max_tokens: int = 1000) -> str:
         """Call LM Studio local API"""
         try:
-            response = requests.post(
-                f"{self.lm_studio_url}/completions",
-                json={
-                    "prompt": prompt,
-                    "max_tokens": max_tokens,
-                    "temperature": 0.7,
-                    "stop": ["\n\n"]
-                },
-                timeout=30
-            )
-            if response.status_code == 200:
-                return response.json().get('choices', [{}])[0].get('text', '').strip()
-            else:
-                return self._fallback_analysis(prompt)
+            return self._request_lm_studio(prompt, max_tokens)
         except Exception as e:
             print(f"LM Studio error: {e}")
             return self._fallback_analysis(prompt)
     
+    def _request_lm_studio(self, prompt: str, max_tokens: int,
+                           stop_when: Optional[Callable[[str], bool]] = None) -> str:
+        """Call LM Studio and raise on failure instead of falling back
+        
+        With stop_when the completion is streamed and the connection is closed,
+        aborting generation, as soon as stop_when(text_so_far) is true.
+        """
+        payload = self._lm_studio_payload(prompt, max_tokens)
+        if stop_when is None:
+            response = self.session.post(
+                f"{self.lm_studio_url}/completions",
+                json=payload,
+                timeout=30
+            )
+            response.raise_for_status()
+            return orjson.loads(response.content).get('choices', [{}])[0].get('text', '').strip()
+        
+        payload['stream'] = True
+        text = ''
+        with self.session.post(
+            f"{self.lm_studio_url}/completions",
+            json=payload,
+            timeout=30,
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                text += self._stream_chunk_text(line)
+                if stop_when(text):
+                    break
+        return text.strip()
+    
+    def _lm_studio_payload(self, prompt: str, max_tokens: int) -> Dict[str, Any]:
+        return {
+            "prompt": prompt,
+            "max_tokens": max_tokens,
+            "temperature": 0.7,
+            "stop": ["\n\n"]
+        }
+    
+    def _stream_chunk_text(self, line: str) -> str:
+        """Text carried by one server-sent event line of a streamed completion"""
+        if not line or not line.startswith('data:'):
+            return ''
+        data = line[len('data:'):].strip()
+        if data == '[DONE]':
+            return ''
+        return orjson.loads(data).get('choices', [{}])[0].get('text', '')
+    
     def call_openai(self, prompt: str, max_tokens: int = 1000) -> str:
         """Call OpenAI API"""
         if not self.openai_key:
             return self.call_lm_studio(prompt, max_tokens)
         
         try:
-            import openai
-            openai.api_key = self.openai_key
-            
+            openai = _get_openai_module()
             response = openai.ChatCompletion.create(
                 model="gpt-3.5-turbo",
                 messages=[{"role": "user", "content": prompt}],
@@ -54,25 +134,113 @@ class AIClient:
     
     def _fallback_analysis(self, prompt: str) -> str:
         """Fallback analysis when AI services are unavailable"""
-        if "priority" in prompt.lower():
+        kind = _fallback_kind(prompt)
+        if kind == 'priority':
             return "0.7"  # Default medium-high priority
-        elif "deadline" in prompt.lower():
-            future_date = datetime.now() + timedelta(days=3)
-            return future_date.strftime("%Y-%m-%d")
-        elif "category" in prompt.lower():
+        elif kind == 'deadline':
+            return "3"  # Days from now, the unit the deadline prompt asks for
+        elif kind == 'category':
             return "General"
-        elif "tags" in prompt.lower():
+        elif kind == 'tags':
             return "task, general"
         else:
             return "Analysis unavailable - using defaults"
 
-    def analyze_with_ai(self, prompt: str, max_tokens: int = 1000) -> str:
-        """Main method to call AI services with fallback"""
+    def analyze_with_ai(self, prompt: str, max_tokens: int = 1000,
+                        cache_key: Optional[Tuple[str, str]] = None,
+                        stop_when: Optional[Callable[[str], bool]] = None) -> str:
+        """Main method to call AI services with fallback
+        
+        cache_key is an optional (namespace, text) pair; responses are reused for
+        later prompts in the same namespace whose text is semantically close.
+        stop_when is a predicate on the partial response; once it holds the
+        stream is cut short, for callers that only need the first few tokens.
+        """
+        try:
+            return self._analyze_cached(prompt, max_tokens, cache_key, stop_when)
+        except Exception as e:
+            print(f"LM Studio error: {e}")
+            result = self._fallback_analysis(prompt)
+        
+            # If LM Studio fails, try OpenAI
+            if "Analysis unavailable" in result and self.openai_key:
+                result = self.call_openai(prompt, max_tokens)
+            return result
+        
+    def _analyze_uncached(self, prompt: str, max_tokens: int,
+                          cache_key: Optional[Tuple[str, str]] = None,
+                          stop_when: Optional[Callable[[str], bool]] = None) -> str:
+        """Serve from the semantic cache or LM Studio, raising if LM Studio fails"""
+        cached = self.cache.get(prompt, max_tokens, cache_key)
+        if cached is not None:
+            return cached
+        
         # Try LM Studio first (recommended)
-        result = self.call_lm_studio(prompt, max_tokens)
+        result = self._request_lm_studio(prompt, max_tokens, stop_when)
+        self.cache.set(prompt, max_tokens, result, cache_key)
+        return result
+
+class AsyncAIClient(AIClient):
+    """AIClient with coroutine variants so several prompts can be in flight at once"""
+    
+    @asynccontextmanager
+    async def async_session(self):
+        """Share one pooled httpx client across all calls made inside the block"""
+        async with httpx.AsyncClient(timeout=30) as client:
+            token = _async_session.set(client)
+            try:
+                yield client
+            finally:
+                _async_session.reset(token)
+    
+    async def _arequest_lm_studio(self, prompt: str, max_tokens: int,
+                                  stop_when: Optional[Callable[[str], bool]] = None) -> str:
+        client = _async_session.get()
+        if client is None:
+            async with self.async_session():
+                return await self._arequest_lm_studio(prompt, max_tokens, stop_when)
+        
+        payload = self._lm_studio_payload(prompt, max_tokens)
+        if stop_when is None:
+            response = await client.post(
+                f"{self.lm_studio_url}/completions",
+                json=payload
+            )
+            response.raise_for_status()
+            return orjson.loads(response.content).get('choices', [{}])[0].get('text', '').strip()
+        
+        payload['stream'] = True
+        text = ''
+        async with client.stream(
+            'POST',
+            f"{self.lm_studio_url}/completions",
+            json=payload
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                text += self._stream_chunk_text(line)
+                if stop_when(text):
+                    break
+        return text.strip()
+    
+    async def aanalyze_with_ai(self, prompt: str, max_tokens: int = 1000,
+                               cache_key: Optional[Tuple[str, str]] = None,
+                               stop_when: Optional[Callable[[str], bool]] = None) -> str:
+        """Async counterpart of analyze_with_ai"""
+        cached = self.cache.get(prompt, max_tokens, cache_key)
+        if cached is not None:
+            return cached
+        
+        try:
+            result = await self._arequest_lm_studio(prompt, max_tokens, stop_when)
+        except Exception as e:
+            print(f"LM Studio error: {e}")
+            result = self._fallback_analysis(prompt)
         
-        # If LM Studio fails, try OpenAI
-        if "Analysis unavailable" in result and self.openai_key:
-            result = self.call_openai(prompt, max_tokens)
+            # The OpenAI SDK call is blocking, keep it off the event loop
+            if "Analysis unavailable" in result and self.openai_key:
+                result = await asyncio.to_thread(self.call_openai, prompt, max_tokens)
+            return result
         
+        self.cache.set(prompt, max_tokens, result, cache_key)
         return result
\ No newline at end of file
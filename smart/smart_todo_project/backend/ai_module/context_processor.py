@@ -1,49 +1,105 @@
 import re
-import json
+import re2
+import functools
+import orjson
+import heapq
+import asyncio
+from asgiref.sync import async_to_sync
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
-from .ai_client import AIClient
+from typing import List, Dict, Any, Tuple
+from .ai_client import AsyncAIClient
+from .keyword_matcher import KeywordMatcher, join_records, record_index
+
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+
+_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'from', 'as', 'is', 'are', 'was', 'were', 'be',
+    'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
+    'would', 'could', 'should', 'may', 'might', 'can', 'this', 'that',
+    'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they'
+})
+
+# All date/time patterns in one alternation so the text is scanned once. RE2 runs
+# it as a linear-time DFA, which matters on bulk WhatsApp/Email imports.
+_DATE_RE = re2.compile(
+    r'\d{1,2}/\d{1,2}/\d{4}'  # MM/DD/YYYY
+    r'|\d{1,2}-\d{1,2}-\d{4}'  # MM-DD-YYYY
+    r'|\d{4}-\d{1,2}-\d{1,2}'  # YYYY-MM-DD
+    r'|today|tomorrow|yesterday'
+    r'|monday|tuesday|wednesday|thursday|friday|saturday|sunday'
+    r'|next week|this week|next month'
+    r'|\d{1,2}:\d{2}\s*(?:am|pm)?'  # Time patterns
+)
+
+_CONTEXT_PROMPT = """
+Analyze this {source_type} message and extract key insights:
+
+Content: "{content}"
+
+Please identify:
+1. Main topic or subject
+2. Any mentioned deadlines or time constraints
+3. Priority level (1-10)
+4. Relevant project or category
+5. Action items mentioned
+
+Respond in JSON format with keys: topic, deadlines, priority, category, actions
+"""
+
+PRIORITY_KEYWORDS = [
+    'urgent', 'asap', 'immediately', 'deadline', 'due', 'important',
+    'critical', 'priority', 'rush', 'emergency', 'today', 'tomorrow'
+]
+
+# Every word list the context heuristics look for, matched in one pass per entry
+_CONTEXT_MATCHER = KeywordMatcher({
+    'positive': [
+        'good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic',
+        'love', 'like', 'enjoy', 'happy', 'excited', 'pleased', 'satisfied'
+    ],
+    'negative': [
+        'bad', 'terrible', 'awful', 'hate', 'dislike', 'angry', 'frustrated',
+        'upset', 'annoyed', 'disappointed', 'worried', 'stressed', 'urgent'
+    ],
+    'priority': PRIORITY_KEYWORDS,
+    'deadline_mention': ['deadline', 'due', 'by'],
+    'urgency_high': ['urgent', 'asap', 'immediately', 'emergency'],
+    'urgency_medium': ['important', 'priority', 'deadline'],
+    'urgency_now': ['today', 'now', 'tonight'],
+    'urgency_soon': ['tomorrow', 'this week'],
+})
 
 class ContextProcessor:
     def __init__(self):
-        self.ai_client = AIClient()
-        self.priority_keywords = [
-            'urgent', 'asap', 'immediately', 'deadline', 'due', 'important',
-            'critical', 'priority', 'rush', 'emergency', 'today', 'tomorrow'
-        ]
+        self.ai_client = AsyncAIClient()
+        self.priority_keywords = list(PRIORITY_KEYWORDS)
         
     def extract_keywords(self, text: str) -> List[str]:
         """Extract important keywords from text"""
-        # Remove special characters and convert to lowercase
-        clean_text = re.sub(r'[^\w\s]', ' ', text.lower())
+        return self._keywords_from_lower(text.lower())
+    
+    def _keywords_from_lower(self, text_lower: str) -> List[str]:
+        # Remove special characters
+        clean_text = _NON_WORD_RE.sub(' ', text_lower)
         words = clean_text.split()
         
-        # Filter out common words and get meaningful keywords
-        stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-            'of', 'with', 'by', 'from', 'as', 'is', 'are', 'was', 'were', 'be',
-            'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
-            'would', 'could', 'should', 'may', 'might', 'can', 'this', 'that',
-            'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they'
-        }
-        
-        keywords = [word for word in words if len(word) > 2 and word not in stop_words]
-        return list(set(keywords))[:10]  # Return top 10 unique keywords
+        # Filter out common words and keep the first 10 unique meaningful keywords
+        keywords = set()
+        for word in words:
+            if len(word) > 2 and word not in _STOP_WORDS:
+                keywords.add(word)
+                if len(keywords) >= 10:
+                    break
+        return list(keywords)
     
     def analyze_sentiment(self, text: str) -> float:
         """Analyze sentiment of text (0-1, where 1 is most positive)"""
-        positive_words = [
-            'good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic',
-            'love', 'like', 'enjoy', 'happy', 'excited', 'pleased', 'satisfied'
-        ]
-        negative_words = [
-            'bad', 'terrible', 'awful', 'hate', 'dislike', 'angry', 'frustrated',
-            'upset', 'annoyed', 'disappointed', 'worried', 'stressed', 'urgent'
-        ]
+        return self._sentiment_from_hits(_CONTEXT_MATCHER.scan(text.lower()))
         
-        text_lower = text.lower()
-        positive_score = sum(1 for word in positive_words if word in text_lower)
-        negative_score = sum(1 for word in negative_words if word in text_lower)
+    def _sentiment_from_hits(self, hits: Dict[str, set]) -> float:
+        positive_score = len(hits['positive'])
+        negative_score = len(hits['negative'])
         
         total_score = positive_score + negative_score
         if total_score == 0:
@@ -53,118 +109,166 @@ class ContextProcessor:
     
     def detect_priority_indicators(self, text: str) -> List[str]:
         """Detect words/phrases that indicate priority"""
-        found_indicators = []
-        text_lower = text.lower()
-        
-        for keyword in self.priority_keywords:
-            if keyword in text_lower:
-                found_indicators.append(keyword)
+        return self._priority_indicators_from_hits(_CONTEXT_MATCHER.scan(text.lower()))
         
-        return found_indicators
+    def _priority_indicators_from_hits(self, hits: Dict[str, set]) -> List[str]:
+        return [keyword for keyword in self.priority_keywords if keyword in hits['priority']]
     
     def extract_dates_and_times(self, text: str) -> List[str]:
         """Extract potential dates and times from text"""
-        date_patterns = [
-            r'\d{1,2}/\d{1,2}/\d{4}',  # MM/DD/YYYY
-            r'\d{1,2}-\d{1,2}-\d{4}',  # MM-DD-YYYY
-            r'\d{4}-\d{1,2}-\d{1,2}',  # YYYY-MM-DD
-            r'today|tomorrow|yesterday',
-            r'monday|tuesday|wednesday|thursday|friday|saturday|sunday',
-            r'next week|this week|next month',
-            r'\d{1,2}:\d{2}\s*(am|pm)?'  # Time patterns
-        ]
-        
-        dates_found = []
-        for pattern in date_patterns:
-            matches = re.findall(pattern, text.lower())
-            dates_found.extend(matches)
-        
-        return dates_found
+        return self._dates_from_lower(text.lower())
+    
+    def _dates_from_lower(self, text_lower: str) -> List[str]:
+        return [match.group(0) for match in _DATE_RE.finditer(text_lower)]
     
     def process_context_entry(self, content: str, source_type: str) -> Dict[str, Any]:
         """Process a single context entry and extract insights"""
-        insights = {
-            'keywords': self.extract_keywords(content),
-            'sentiment_score': self.analyze_sentiment(content),
-            'priority_indicators': self.detect_priority_indicators(content),
-            'dates_mentioned': self.extract_dates_and_times(content),
-            'word_count': len(content.split()),
-            'has_deadline_mention': any(word in content.lower() 
-                                      for word in ['deadline', 'due', 'by']),
-            'urgency_level': self._calculate_urgency(content)
-        }
+        # Lowercase once and share it between every heuristic
+        text_lower = content.lower()
+        hits = _CONTEXT_MATCHER.scan(text_lower)
+        insights = self._heuristic_insights(
+            content, text_lower, hits, self._dates_from_lower(text_lower)
+        )
         
         # Use AI for deeper analysis if available
         try:
-            ai_prompt = f"""
-            Analyze this {source_type.lower()} message and extract key insights:
-            
-            Content: "{content}"
-            
-            Please identify:
-            1. Main topic or subject
-            2. Any mentioned deadlines or time constraints
-            3. Priority level (1-10)
-            4. Relevant project or category
-            5. Action items mentioned
-            
-            Respond in JSON format with keys: topic, deadlines, priority, category, actions
-            """
-            
-            ai_response = self.ai_client.analyze_with_ai(ai_prompt, 500)
-            try:
-                ai_insights = json.loads(ai_response)
-                insights['ai_analysis'] = ai_insights
-            except json.JSONDecodeError:
-                insights['ai_analysis'] = {'raw_response': ai_response}
+            ai_prompt, cache_key = self._build_context_prompt(content, source_type)
+            ai_response = self.ai_client.analyze_with_ai(ai_prompt, 500, cache_key)
+            insights['ai_analysis'] = self._parse_ai_insights(ai_response)
         except Exception as e:
             insights['ai_analysis'] = {'error': str(e)}
         
         return insights
     
+    def process_context_batch(self, entries: List[Tuple[str, str]],
+                              concurrency: int = 32) -> List[Dict[str, Any]]:
+        """Process many (content, source_type) entries, e.g. a WhatsApp export"""
+        return async_to_sync(self.aprocess_context_batch)(entries, concurrency)
+    
+    async def aprocess_context_batch(self, entries: List[Tuple[str, str]],
+                                     concurrency: int = 32) -> List[Dict[str, Any]]:
+        """Batch form of process_context_entry
+        
+        Keyword hits and dates for the whole batch come from one scan of the
+        concatenated text, and the AI calls run concurrently, at most
+        `concurrency` at a time so LM Studio is not flooded.
+        """
+        contents = [content for content, _ in entries]
+        texts_lower = [content.lower() for content in contents]
+        
+        batch_hits = _CONTEXT_MATCHER.scan_many(texts_lower)
+        batch_dates = [[] for _ in texts_lower]
+        buffer, starts = join_records(texts_lower)
+        for match in _DATE_RE.finditer(buffer):
+            batch_dates[record_index(starts, match.start())].append(match.group(0))
+        
+        batch_insights = [
+            self._heuristic_insights(content, text_lower, hits, dates)
+            for content, text_lower, hits, dates in zip(contents, texts_lower, batch_hits, batch_dates)
+        ]
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def analyze(content: str, source_type: str, insights: Dict[str, Any]):
+            try:
+                ai_prompt, cache_key = self._build_context_prompt(content, source_type)
+                async with semaphore:
+                    ai_response = await self.ai_client.aanalyze_with_ai(
+                        ai_prompt, 500, cache_key
+                    )
+                insights['ai_analysis'] = self._parse_ai_insights(ai_response)
+            except Exception as e:
+                insights['ai_analysis'] = {'error': str(e)}
+        
+        async with self.ai_client.async_session():
+            await asyncio.gather(*(
+                analyze(content, source_type, insights)
+                for (content, source_type), insights in zip(entries, batch_insights)
+            ))
+        
+        return batch_insights
+    
+    def _heuristic_insights(self, content: str, text_lower: str, hits: Dict[str, set],
+                            dates: List[str]) -> Dict[str, Any]:
+        return {
+            'keywords': self._keywords_from_lower(text_lower),
+            'sentiment_score': self._sentiment_from_hits(hits),
+            'priority_indicators': self._priority_indicators_from_hits(hits),
+            'dates_mentioned': dates,
+            'word_count': len(content.split()),
+            'has_deadline_mention': bool(hits['deadline_mention']),
+            'urgency_level': self._urgency_from_hits(hits, content.count('!'))
+        }
+    
+    def _build_context_prompt(self, content: str, source_type: str) -> Tuple[str, None]:
+        # Insights are facts read from this exact message (dates, people), so only
+        # exact prompt hits are reused; a similar message can name another day
+        prompt = _CONTEXT_PROMPT.format(source_type=source_type.lower(), content=content)
+        return prompt, None
+    
+    def _parse_ai_insights(self, ai_response: str) -> Dict[str, Any]:
+        try:
+            return orjson.loads(ai_response)
+        except orjson.JSONDecodeError:
+            return {'raw_response': ai_response}
+    
     def _calculate_urgency(self, text: str) -> int:
         """Calculate urgency level 1-10 based on text content"""
+        return self._urgency_from_hits(_CONTEXT_MATCHER.scan(text.lower()), text.count('!'))
+    
+    def _urgency_from_hits(self, hits: Dict[str, set], exclamation_count: int) -> int:
         urgency_score = 1
-        text_lower = text.lower()
         
         # High urgency indicators
-        if any(word in text_lower for word in ['urgent', 'asap', 'immediately', 'emergency']):
+        if hits['urgency_high']:
             urgency_score += 4
         
         # Medium urgency indicators
-        if any(word in text_lower for word in ['important', 'priority', 'deadline']):
+        if hits['urgency_medium']:
             urgency_score += 2
         
         # Time-based urgency
-        if any(word in text_lower for word in ['today', 'now', 'tonight']):
+        if hits['urgency_now']:
             urgency_score += 3
-        elif any(word in text_lower for word in ['tomorrow', 'this week']):
+        elif hits['urgency_soon']:
             urgency_score += 2
         
         # Multiple exclamation marks
-        urgency_score += min(text.count('!'), 2)
+        urgency_score += min(exclamation_count, 2)
         
         return min(urgency_score, 10)
     
     def find_relevant_contexts(self, task_content: str, context_entries: List[Dict]) -> List[Dict]:
         """Find context entries relevant to a task"""
         task_keywords = set(self.extract_keywords(task_content))
-        relevant_contexts = []
+        if not task_keywords:
+            return []
+        
+        keyword_count = len(task_keywords)
+        scored = []
         
-        for context in context_entries:
-            context_keywords = set(context.get('keywords', []))
+        for index, context in enumerate(context_entries):
+            # set.intersection accepts the keyword list directly, no per-context set
+            overlap = task_keywords.intersection(context.get('keywords', ()))
             
             # Calculate relevance score based on keyword overlap
-            overlap = task_keywords.intersection(context_keywords)
-            relevance_score = len(overlap) / max(len(task_keywords), 1)
+            relevance_score = len(overlap) / keyword_count
             
             if relevance_score > 0.1:  # Minimum relevance threshold
-                relevant_contexts.append({
-                    'context': context,
-                    'relevance_score': relevance_score,
-                    'matching_keywords': list(overlap)
-                })
-        
-        # Sort by relevance score
-        relevant_contexts.sort(key=lambda x: x['relevance_score'], reverse=True)
-        return relevant_contexts[:5]  # Return top 5 most relevant
\ No newline at end of file
+                scored.append((relevance_score, index, overlap))
+        
+        # Top 5 by relevance score; ties keep their input order like a stable sort
+        top = heapq.nsmallest(5, scored, key=lambda item: (-item[0], item[1]))
+        return [
+            {
+                'context': context_entries[index],
+                'relevance_score': relevance_score,
+                'matching_keywords': list(overlap)
+            }
+            for relevance_score, index, overlap in top
+        ]
+
+@functools.lru_cache(maxsize=1)
+def get_context_processor() -> ContextProcessor:
+    """Process-wide ContextProcessor, so its HTTP sessions and response memo outlive a request"""
+    return ContextProcessor()
\ No newline at end of file
@@ -0,0 +1,55 @@
+import bisect
+import ahocorasick
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Sequence, Set, Tuple
+
+# ASCII record separator; never part of a keyword, so no match can span two records
+RECORD_SEPARATOR = '\x1e'
+
+def join_records(texts: Sequence[str]) -> Tuple[str, List[int]]:
+    """Join texts into one buffer and return it with each record's start offset"""
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text) + len(RECORD_SEPARATOR)
+    return RECORD_SEPARATOR.join(texts), starts
+
+def record_index(starts: List[int], position: int) -> int:
+    """Index of the record containing a position in a join_records buffer"""
+    return bisect.bisect_right(starts, position) - 1
+
+class KeywordMatcher:
+    """Match several keyword lists against a text in a single Aho-Corasick pass"""
+
+    def __init__(self, buckets: Dict[Hashable, Iterable[str]]):
+        keyword_buckets = defaultdict(list)
+        for bucket, keywords in buckets.items():
+            for keyword in keywords:
+                keyword_buckets[keyword].append(bucket)
+
+        self._automaton = ahocorasick.Automaton()
+        for keyword, keyword_bucket_ids in keyword_buckets.items():
+            self._automaton.add_word(keyword, (keyword, tuple(keyword_bucket_ids)))
+        self._automaton.make_automaton()
+
+    def scan(self, text_lower: str) -> Dict[Hashable, Set[str]]:
+        """Return the keywords found in the text, grouped by bucket
+
+        Matching is by substring, the same as `keyword in text_lower`.
+        """
+        hits = defaultdict(set)
+        for _, (keyword, bucket_ids) in self._automaton.iter(text_lower):
+            for bucket in bucket_ids:
+                hits[bucket].add(keyword)
+        return hits
+    
+    def scan_many(self, texts_lower: Sequence[str]) -> List[Dict[Hashable, Set[str]]]:
+        """Scan a batch of texts in one automaton pass, returning scan() results per text"""
+        buffer, starts = join_records(texts_lower)
+        results = [defaultdict(set) for _ in texts_lower]
+        for end, (keyword, bucket_ids) in self._automaton.iter(buffer):
+            hits = results[record_index(starts, end)]
+            for bucket in bucket_ids:
+                hits[bucket].add(keyword)
+        return results
\ No newline at end of file
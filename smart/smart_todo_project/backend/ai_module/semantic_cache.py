@@ -0,0 +1,237 @@
+import os
+import re
+import math
+import sqlite3
+import hashlib
+import threading
+import orjson
+from collections import Counter, OrderedDict
+from typing import Dict, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ai_cache_exact (
+    digest TEXT PRIMARY KEY,
+    response TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ai_cache_similar (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    namespace TEXT NOT NULL,
+    text TEXT NOT NULL,
+    embedding BLOB NOT NULL,
+    response TEXT NOT NULL
+);
+"""
+
+class SemanticCache:
+    """Cache AI responses by exact prompt and by similarity of the text being analyzed
+    
+    With a `path`, entries are also written to a SQLite file in WAL mode so they
+    survive restarts and are shared by every worker using the same file. Exact
+    hits are looked up by digest; similarity entries written by other processes
+    are pulled into the in-memory index by rowid before each similarity search.
+    
+    The file is opened on first use in each process, so the cache can be built
+    at import time in a parent (Celery prefork, gunicorn --preload) and every
+    forked worker still gets its own connection.
+    """
+    
+    def __init__(self, threshold: float = 0.85, maxsize: int = 2048, path: Optional[str] = None):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._exact = OrderedDict()  # sha256 of prompt -> response
+        # One LRU across namespaces, so namespaces derived from prompt content
+        # can't grow the index without bound; _namespaces indexes it for search
+        self._similar = OrderedDict()  # (namespace, text) -> (embedding, response)
+        self._namespaces = {}  # namespace -> {text: None} for its texts in _similar
+        self._lock = threading.Lock()
+        self._path = path
+        self._db = None
+        self._db_pid = None
+        self._inherited_dbs = []
+        self._last_row_id = 0
+    
+    def embed(self, text: str) -> Dict[str, float]:
+        """Turn text into a normalized sparse term-frequency vector"""
+        counts = Counter(re.findall(r'\w+', text.lower()))
+        norm = math.sqrt(sum(count * count for count in counts.values())) or 1.0
+        return {term: count / norm for term, count in counts.items()}
+    
+    def similarity(self, a: Dict[str, float], b: Dict[str, float]) -> float:
+        """Cosine similarity of two normalized vectors"""
+        if len(a) > len(b):
+            a, b = b, a
+        return sum(weight * b.get(term, 0.0) for term, weight in a.items())
+    
+    def get(self, prompt: str, max_tokens: int,
+            cache_key: Optional[Tuple[str, str]] = None) -> Optional[str]:
+        """Return a cached response for the prompt, or None on a miss"""
+        digest = self._digest(prompt, max_tokens)
+        with self._lock:
+            if digest in self._exact:
+                self._exact.move_to_end(digest)
+                return self._exact[digest]
+            
+            stored = self._db_exact(digest)
+            if stored is not None:
+                self._remember_exact(digest, stored)
+                return stored
+            
+            if cache_key is None:
+                return None
+            
+            self._sync_similar()
+            namespace, text = cache_key
+            texts = self._namespaces.get(namespace)
+            if not texts:
+                return None
+            
+            query = self.embed(text)
+            best_score, best_key = 0.0, None
+            for cached_text in texts:
+                key = (namespace, cached_text)
+                score = self.similarity(query, self._similar[key][0])
+                if score > best_score:
+                    best_score, best_key = score, key
+            
+            if best_score > self.threshold:
+                self._similar.move_to_end(best_key)
+                return self._similar[best_key][1]
+            return None
+    
+    def set(self, prompt: str, max_tokens: int, response: str,
+            cache_key: Optional[Tuple[str, str]] = None):
+        """Store a response under the exact prompt and, if given, its semantic key"""
+        digest = self._digest(prompt, max_tokens)
+        with self._lock:
+            self._remember_exact(digest, response)
+            
+            if cache_key is None:
+                self._db_store(digest, response)
+                return
+            
+            namespace, text = cache_key
+            embedding = self.embed(text)
+            self._remember_similar(namespace, text, embedding, response)
+            self._db_store(digest, response, (namespace, text, embedding))
+    
+    def _digest(self, prompt: str, max_tokens: int) -> str:
+        return hashlib.sha256(f"{max_tokens}:{prompt}".encode('utf-8')).hexdigest()
+    
+    def _remember_exact(self, digest: str, response: str):
+        self._exact[digest] = response
+        self._exact.move_to_end(digest)
+        if len(self._exact) > self.maxsize:
+            self._exact.popitem(last=False)
+    
+    def _remember_similar(self, namespace: str, text: str,
+                          embedding: Dict[str, float], response: str):
+        key = (namespace, text)
+        self._similar[key] = (embedding, response)
+        self._similar.move_to_end(key)
+        self._namespaces.setdefault(namespace, {})[text] = None
+        if len(self._similar) > self.maxsize:
+            (old_namespace, old_text), _ = self._similar.popitem(last=False)
+            texts = self._namespaces[old_namespace]
+            del texts[old_text]
+            if not texts:
+                del self._namespaces[old_namespace]
+    
+    # SQLite persistence. Callers hold self._lock; a failing database only
+    # costs cache hits, so errors fall back to the in-memory cache.
+    
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """This process's connection, opened on first use and again after a fork"""
+        if self._path is None:
+            return None
+        if self._db_pid != os.getpid():
+            if self._db is not None:
+                # A connection must not be used or closed across fork(); keep the
+                # parent's referenced so it is never finalized in this process
+                self._inherited_dbs.append(self._db)
+                self._db = None
+            self._open(self._path)
+        return self._db
+    
+    def _open(self, path: str):
+        # Tried once per process; a failed open leaves the cache in memory only
+        self._db_pid = os.getpid()
+        try:
+            db = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.executescript(_SCHEMA)
+        except sqlite3.Error as e:
+            print(f"AI cache database unavailable: {e}")
+            return
+        self._db = db
+        
+        # Warm the similarity index with the newest persisted entries
+        self._sync_similar()
+    
+    def _db_exact(self, digest: str) -> Optional[str]:
+        db = self._connection()
+        if db is None:
+            return None
+        try:
+            row = db.execute(
+                'SELECT response FROM ai_cache_exact WHERE digest = ?', (digest,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+    
+    def _db_store(self, digest: str, response: str,
+                  similar: Optional[Tuple[str, str, Dict[str, float]]] = None):
+        db = self._connection()
+        if db is None:
+            return
+        try:
+            with db:
+                db.execute('BEGIN')
+                db.execute(
+                    'INSERT OR REPLACE INTO ai_cache_exact (digest, response) VALUES (?, ?)',
+                    (digest, response)
+                )
+                # Keep the file bounded: the newest rows win, like the in-memory LRUs
+                db.execute(
+                    'DELETE FROM ai_cache_exact WHERE rowid <= '
+                    '(SELECT max(rowid) FROM ai_cache_exact) - ?', (self._db_maxrows(),)
+                )
+                if similar is not None:
+                    namespace, text, embedding = similar
+                    db.execute(
+                        'INSERT INTO ai_cache_similar (namespace, text, embedding, response) '
+                        'VALUES (?, ?, ?, ?)',
+                        (namespace, text, orjson.dumps(embedding), response)
+                    )
+                    db.execute(
+                        'DELETE FROM ai_cache_similar WHERE id <= '
+                        '(SELECT max(id) FROM ai_cache_similar) - ?', (self.maxsize,)
+                    )
+        except sqlite3.Error as e:
+            print(f"AI cache write failed: {e}")
+    
+    def _sync_similar(self):
+        """Load similarity entries added since the last sync, by this or any other process
+        
+        Only the newest maxsize rows can stay in the index, so older ones are
+        never read.
+        """
+        db = self._connection()
+        if db is None:
+            return
+        try:
+            rows = db.execute(
+                'SELECT id, namespace, text, embedding, response FROM ai_cache_similar '
+                'WHERE id > max(?, (SELECT coalesce(max(id), 0) FROM ai_cache_similar) - ?) '
+                'ORDER BY id', (self._last_row_id, self.maxsize)
+            ).fetchall()
+        except sqlite3.Error:
+            return
+        for row_id, namespace, text, embedding, response in rows:
+            self._remember_similar(namespace, text, orjson.loads(embedding), response)
+            self._last_row_id = row_id
+    
+    def _db_maxrows(self) -> int:
+        # Exact hits are read straight from the file, so it keeps more than memory
+        return self.maxsize * 8
\ No newline at end of file
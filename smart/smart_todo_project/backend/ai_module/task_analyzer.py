@@ -1,17 +1,218 @@
+import re
 import json
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
-from .ai_client import AIClient
-from .context_processor import ContextProcessor
+import functools
+import asyncio
+import orjson
+from asgiref.sync import async_to_sync
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Optional, Tuple
+from .ai_client import AsyncAIClient
+from .context_processor import get_context_processor
+from .keyword_matcher import KeywordMatcher
+
+# Prompt templates are built once at import; each call only fills in the fields
+_PRIORITY_PROMPT = """
+Analyze the priority of this task on a scale of 0.0 to 1.0 (where 1.0 is highest priority):
+
+Task: {task_title}
+Description: {task_description}
+{context_info}
+
+Consider:
+1. Urgency and deadlines
+2. Impact and importance
+3. Dependencies and context
+4. Keywords indicating priority
+
+Respond with only a decimal number between 0.0 and 1.0
+"""
+
+_DEADLINE_PROMPT = """
+Suggest a realistic deadline for this task. Consider the complexity and current workload.
+
+Task: {task_title}
+Description: {task_description}
+Current workload (1-10): {current_workload}
+
+Based on the task complexity, suggest how many days from now this should be completed.
+Respond with only a number (days from now).
+"""
+
+_CATEGORY_PROMPT = """
+Suggest the most appropriate category for this task:
+
+Task: {task_title}
+Description: {task_description}
+{categories_info}
+
+Choose from existing categories if possible, or suggest a new one.
+Respond with only the category name.
+"""
+
+_TAGS_PROMPT = """
+Suggest 3-5 relevant tags for this task:
+
+Task: {task_title}
+Description: {task_description}
+
+Respond with comma-separated tags (no spaces after commas).
+"""
+
+_DESCRIPTION_PROMPT = """
+Enhance this task description with relevant details and context:
+
+Original Task: {task_title}
+Current Description: {original_description}
+{context_info}
+
+Provide an enhanced description that includes:
+1. Clear objectives
+2. Relevant context
+3. Potential steps or considerations
+
+Keep it concise but informative (max 200 words).
+"""
+
+# Several tasks per prompt for analyze_batch; each line of {task_list} is "N. title: description"
+_BATCH_PROMPT = """
+{instruction}
+
+{task_list}
+
+Respond with only a JSON array of {count} answers, one per task, in the same order.
+"""
+
+_BATCH_INSTRUCTIONS = {
+    'priority': "Analyze the priority of each task on a scale of 0.0 to 1.0 "
+                "(where 1.0 is highest priority). Each answer is a decimal number.{context_info}",
+    'deadline': "Suggest a realistic deadline for each task, as a whole number of days from now. "
+                "Consider the complexity and the current workload (1-10): {current_workload}",
+    'category': "Suggest the most appropriate category for each task. Each answer is a category name. "
+                "Choose from existing categories if possible, or suggest a new one.{categories_info}",
+    'tags': "Suggest 3-5 relevant tags for each task. Each answer is an array of tag strings.",
+}
+
+# Tasks per batched prompt, and the answer tokens budgeted per task in it
+_BATCH_SIZE = 8
+_BATCH_TOKENS_PER_TASK = {'priority': 16, 'deadline': 16, 'category': 24, 'tags': 64}
+
+async def _limited(semaphore: asyncio.Semaphore, awaitable):
+    """Await once the semaphore has a free slot"""
+    async with semaphore:
+        return await awaitable
+
+# A complete answer has been streamed once the number is followed by another character
+_PRIORITY_ANSWER_RE = re.compile(r'(?:0\.\d+|1\.0)\D')
+_DAYS_ANSWER_RE = re.compile(r'\d+\D')
+
+# Deadline offsets are 0-30 days, so build the timedeltas once and index them
+_TD_DAYS = [timedelta(days=i) for i in range(31)]
+
+# Checked in order, the first category with a matching keyword wins
+_FALLBACK_CATEGORIES = [
+    ('Meetings', ['meeting', 'call', 'discuss']),
+    ('Development', ['code', 'develop', 'program', 'bug', 'feature']),
+    ('Communication', ['email', 'message', 'contact', 'reply']),
+    ('Shopping', ['buy', 'purchase', 'shop', 'order']),
+    ('Health', ['health', 'doctor', 'exercise', 'medical']),
+    ('Personal', ['clean', 'organize', 'home', 'house']),
+]
+
+_FALLBACK_TAGS = [
+    ('urgent', ['urgent', 'asap', 'critical']),
+    ('meeting', ['meeting', 'call']),
+    ('work', ['work', 'office', 'project']),
+    ('personal', ['personal', 'home', 'family']),
+    ('follow-up', ['follow-up', 'followup', 'follow']),
+]
+
+# Keywords that on their own mark a task high priority
+_PRIORITY_HIGH = ['urgent', 'critical', 'asap', 'emergency']
+
+# Every keyword list the fallback heuristics use, matched in one pass per text
+_FALLBACK_MATCHER = KeywordMatcher({
+    'priority_high': _PRIORITY_HIGH,
+    'priority_medium': ['important', 'priority', 'deadline'],
+    'priority_low': ['meeting', 'call', 'presentation'],
+    'deadline_1': ['urgent', 'asap', 'today'],
+    'deadline_2': ['tomorrow', 'soon'],
+    'deadline_7': ['week', 'weekly'],
+    **{('category', name): keywords for name, keywords in _FALLBACK_CATEGORIES},
+    **{('tag', name): keywords for name, keywords in _FALLBACK_TAGS},
+})
+
+# Whole-word forms of the category and tag keywords. Substring hits ('call' in
+# 'recall', 'home' in 'homework') still pick the fallback answer, but only
+# whole-word hits make it confident enough to skip the LLM.
+_FALLBACK_WORDS = {
+    (kind, name): re.compile(r'\b(?:' + '|'.join(map(re.escape, keywords)) + r')\b')
+    for kind, buckets in (('category', _FALLBACK_CATEGORIES), ('tag', _FALLBACK_TAGS))
+    for name, keywords in buckets
+}
+
+# Strong priority keywords as whole words, and their negated forms ('not urgent',
+# 'non-critical', 'no emergency'), which must not make a high priority confident
+_PRIORITY_HIGH_WORDS = re.compile(r'\b(?:' + '|'.join(_PRIORITY_HIGH) + r')\b')
+_NEGATED_PRIORITY_HIGH = re.compile(
+    r"\b(?:not|non|no|nothing|isn't|never)[\s-]+(?:(?:very|that|so|too)\s+)?"
+    r'(?:' + '|'.join(_PRIORITY_HIGH) + r')\b'
+)
+
+# The tags prompt asks for 3-5 tags, so fewer whole-word tag hits go to the LLM
+_CONFIDENT_TAG_COUNT = 3
+
+# Heuristic answers at or above this confidence are returned without asking the LLM
+_HEURISTIC_CONFIDENCE = 0.8
 
 class TaskAnalyzer:
     def __init__(self):
-        self.ai_client = AIClient()
-        self.context_processor = ContextProcessor()
+        self.ai_client = AsyncAIClient()
+        self.context_processor = get_context_processor()
         
     def analyze_task_priority(self, task_title: str, task_description: str, 
                             context_data: List[Dict] = None) -> float:
         """Analyze task priority using AI and context"""
+        score, confidence = self._calculate_fallback_priority(task_title, task_description)
+        if confidence >= _HEURISTIC_CONFIDENCE:
+            return score
+        
+        prompt, cache_key = self._build_priority_prompt(task_title, task_description, context_data)
+        
+        try:
+            result = self.ai_client.analyze_with_ai(
+                prompt, 100, cache_key, _PRIORITY_ANSWER_RE.search
+            )
+            return self._parse_priority(result)
+        except:
+            return score
+    
+    async def aanalyze_task_priority(self, task_title: str, task_description: str,
+                                     context_data: List[Dict] = None) -> float:
+        """Async variant of analyze_task_priority"""
+        score, confidence = self._calculate_fallback_priority(task_title, task_description)
+        if confidence >= _HEURISTIC_CONFIDENCE:
+            return score
+        
+        prompt, cache_key = self._build_priority_prompt(task_title, task_description, context_data)
+        
+        try:
+            result = await self.ai_client.aanalyze_with_ai(
+                prompt, 100, cache_key, _PRIORITY_ANSWER_RE.search
+            )
+            return self._parse_priority(result)
+        except Exception:
+            return score
+    
+    def _build_priority_prompt(self, task_title: str, task_description: str,
+                               context_data: List[Dict] = None) -> Tuple[str, Tuple[str, str]]:
+        context_info = self._priority_context_info(context_data)
+        cache_key = (f"priority|{context_info}", f"{task_title} {task_description}")
+        prompt = _PRIORITY_PROMPT.format(
+            task_title=task_title, task_description=task_description, context_info=context_info
+        )
+        return prompt, cache_key
+    
+    def _priority_context_info(self, context_data: List[Dict] = None) -> str:
         context_info = ""
         if context_data:
             # Get recent high-priority contexts
@@ -22,235 +223,465 @@ class TaskAnalyzer:
                 context_info = "\nRecent important context:\n"
                 for ctx in recent_contexts:
                     context_info += f"- {ctx.get('content', '')[:100]}...\n"
+        return context_info
         
-        prompt = f"""
-        Analyze the priority of this task on a scale of 0.0 to 1.0 (where 1.0 is highest priority):
-        
-        Task: {task_title}
-        Description: {task_description}
-        {context_info}
-        
-        Consider:
-        1. Urgency and deadlines
-        2. Impact and importance
-        3. Dependencies and context
-        4. Keywords indicating priority
-        
-        Respond with only a decimal number between 0.0 and 1.0
-        """
-        
-        try:
-            result = self.ai_client.analyze_with_ai(prompt, 100)
-            # Extract number from response
-            import re
-            numbers = re.findall(r'0\.\d+|1\.0', result)
-            if numbers:
-                return float(numbers[0])
-            else:
-                return 0.5  # Default medium priority
-        except:
-            return self._calculate_fallback_priority(task_title, task_description)
+    def _parse_priority(self, result: str) -> float:
+        # Extract number from response
+        numbers = re.findall(r'0\.\d+|1\.0', result)
+        if numbers:
+            return float(numbers[0])
+        else:
+            return 0.5  # Default medium priority
     
     def suggest_deadline(self, task_title: str, task_description: str, 
                         current_workload: int = 5) -> datetime:
         """Suggest deadline based on task complexity and current workload"""
-        prompt = f"""
-        Suggest a realistic deadline for this task. Consider the complexity and current workload.
-        
-        Task: {task_title}
-        Description: {task_description}
-        Current workload (1-10): {current_workload}
-        
-        Based on the task complexity, suggest how many days from now this should be completed.
-        Respond with only a number (days from now).
-        """
+        prompt, cache_key = self._build_deadline_prompt(task_title, task_description, current_workload)
         
         try:
-            result = self.ai_client.analyze_with_ai(prompt, 100)
-            # Extract number from response
-            import re
-            days = re.findall(r'\d+', result)
-            if days:
-                days_ahead = min(int(days[0]), 30)  # Cap at 30 days
-                return datetime.now() + timedelta(days=days_ahead)
-            else:
-                return datetime.now() + timedelta(days=3)  # Default 3 days
+            result = self.ai_client.analyze_with_ai(
+                prompt, 100, cache_key, _DAYS_ANSWER_RE.search
+            )
+            return self._parse_deadline(result)
         except:
             return self._calculate_fallback_deadline(task_description)
     
+    async def asuggest_deadline(self, task_title: str, task_description: str,
+                                current_workload: int = 5) -> datetime:
+        """Async variant of suggest_deadline"""
+        prompt, cache_key = self._build_deadline_prompt(task_title, task_description, current_workload)
+        
+        try:
+            result = await self.ai_client.aanalyze_with_ai(
+                prompt, 100, cache_key, _DAYS_ANSWER_RE.search
+            )
+            return self._parse_deadline(result)
+        except Exception:
+            return self._calculate_fallback_deadline(task_description)
+    
+    def _build_deadline_prompt(self, task_title: str, task_description: str,
+                               current_workload: int) -> Tuple[str, Tuple[str, str]]:
+        cache_key = (f"deadline|{current_workload}", f"{task_title} {task_description}")
+        prompt = _DEADLINE_PROMPT.format(
+            task_title=task_title, task_description=task_description,
+            current_workload=current_workload
+        )
+        return prompt, cache_key
+        
+    def _parse_deadline(self, result: str) -> datetime:
+        # Extract number from response
+        days = re.findall(r'\d+', result)
+        if days:
+            days_ahead = min(int(days[0]), 30)  # Cap at 30 days
+            return datetime.now(timezone.utc) + _TD_DAYS[days_ahead]
+        else:
+            return datetime.now(timezone.utc) + _TD_DAYS[3]  # Default 3 days
+    
     def suggest_category(self, task_title: str, task_description: str, 
                         existing_categories: List[str] = None) -> str:
         """Suggest task category based on content"""
-        categories_info = ""
-        if existing_categories:
-            categories_info = f"\nExisting categories: {', '.join(existing_categories)}"
+        category, confidence = self._suggest_fallback_category(task_title, task_description)
+        if confidence >= _HEURISTIC_CONFIDENCE:
+            return category
         
-        prompt = f"""
-        Suggest the most appropriate category for this task:
+        prompt, cache_key = self._build_category_prompt(task_title, task_description, existing_categories)
         
-        Task: {task_title}
-        Description: {task_description}
-        {categories_info}
+        try:
+            result = self.ai_client.analyze_with_ai(prompt, 50, cache_key)
+            return result.strip().title()
+        except:
+            return category
+    
+    async def asuggest_category(self, task_title: str, task_description: str,
+                                existing_categories: List[str] = None) -> str:
+        """Async variant of suggest_category"""
+        category, confidence = self._suggest_fallback_category(task_title, task_description)
+        if confidence >= _HEURISTIC_CONFIDENCE:
+            return category
         
-        Choose from existing categories if possible, or suggest a new one.
-        Respond with only the category name.
-        """
+        prompt, cache_key = self._build_category_prompt(task_title, task_description, existing_categories)
         
         try:
-            result = self.ai_client.analyze_with_ai(prompt, 50)
+            result = await self.ai_client.aanalyze_with_ai(prompt, 50, cache_key)
             return result.strip().title()
-        except:
-            return self._suggest_fallback_category(task_title, task_description)
+        except Exception:
+            return category
+    
+    def _build_category_prompt(self, task_title: str, task_description: str,
+                               existing_categories: List[str] = None) -> Tuple[str, Tuple[str, str]]:
+        categories_info = self._categories_info(existing_categories)
+        cache_key = (f"category|{categories_info}", f"{task_title} {task_description}")
+        prompt = _CATEGORY_PROMPT.format(
+            task_title=task_title, task_description=task_description,
+            categories_info=categories_info
+        )
+        return prompt, cache_key
+        
+    def _categories_info(self, existing_categories: List[str] = None) -> str:
+        if existing_categories:
+            return f"\nExisting categories: {', '.join(existing_categories)}"
+        return ""
     
     def suggest_tags(self, task_title: str, task_description: str) -> List[str]:
         """Suggest relevant tags for the task"""
-        prompt = f"""
-        Suggest 3-5 relevant tags for this task:
-        
-        Task: {task_title}
-        Description: {task_description}
+        tags, confidence = self._suggest_fallback_tags(task_title, task_description)
+        if confidence >= _HEURISTIC_CONFIDENCE:
+            return tags
         
-        Respond with comma-separated tags (no spaces after commas).
-        """
+        prompt, cache_key = self._build_tags_prompt(task_title, task_description)
         
         try:
-            result = self.ai_client.analyze_with_ai(prompt, 100)
-            tags = [tag.strip().lower() for tag in result.split(',')]
-            return tags[:5]  # Limit to 5 tags
+            result = self.ai_client.analyze_with_ai(prompt, 100, cache_key)
+            return self._parse_tags(result)
         except:
-            return self._suggest_fallback_tags(task_title, task_description)
+            return tags
+    
+    async def asuggest_tags(self, task_title: str, task_description: str) -> List[str]:
+        """Async variant of suggest_tags"""
+        tags, confidence = self._suggest_fallback_tags(task_title, task_description)
+        if confidence >= _HEURISTIC_CONFIDENCE:
+            return tags
+        
+        prompt, cache_key = self._build_tags_prompt(task_title, task_description)
+        
+        try:
+            result = await self.ai_client.aanalyze_with_ai(prompt, 100, cache_key)
+            return self._parse_tags(result)
+        except Exception:
+            return tags
+    
+    def _build_tags_prompt(self, task_title: str, task_description: str) -> Tuple[str, Tuple[str, str]]:
+        cache_key = ("tags", f"{task_title} {task_description}")
+        prompt = _TAGS_PROMPT.format(
+            task_title=task_title, task_description=task_description
+        )
+        return prompt, cache_key
+        
+    def _parse_tags(self, result: str) -> List[str]:
+        tags = [tag.strip().lower() for tag in result.split(',')]
+        return tags[:5]  # Limit to 5 tags
+    
+    def _parse_batch_tags(self, answer: Any) -> List[str]:
+        if isinstance(answer, str):
+            return self._parse_tags(answer)
+        return [tag.strip().lower() for tag in answer][:5]
     
     def enhance_task_description(self, task_title: str, original_description: str,
                                 relevant_contexts: List[Dict] = None) -> str:
         """Enhance task description with context-aware details"""
+        prompt, cache_key = self._build_description_prompt(task_title, original_description, relevant_contexts)
+        
+        try:
+            result = self.ai_client.analyze_with_ai(prompt, 300, cache_key)
+            return result.strip()
+        except:
+            return original_description or f"Complete the task: {task_title}"
+    
+    async def aenhance_task_description(self, task_title: str, original_description: str,
+                                        relevant_contexts: List[Dict] = None) -> str:
+        """Async variant of enhance_task_description"""
+        prompt, cache_key = self._build_description_prompt(task_title, original_description, relevant_contexts)
+        
+        try:
+            result = await self.ai_client.aanalyze_with_ai(prompt, 300, cache_key)
+            return result.strip()
+        except Exception:
+            return original_description or f"Complete the task: {task_title}"
+    
+    def _build_description_prompt(self, task_title: str, original_description: str,
+                                   relevant_contexts: List[Dict] = None) -> Tuple[str, None]:
         context_info = ""
         if relevant_contexts:
             context_info = "\nRelevant context:\n"
             for ctx in relevant_contexts[:2]:  # Use top 2 relevant contexts
                 context_info += f"- {ctx['context'].get('content', '')[:150]}...\n"
         
-        prompt = f"""
-        Enhance this task description with relevant details and context:
-        
-        Original Task: {task_title}
-        Current Description: {original_description}
-        {context_info}
+        prompt = _DESCRIPTION_PROMPT.format(
+            task_title=task_title, original_description=original_description,
+            context_info=context_info
+        )
+        # The description is free text about this exact task, so only exact prompt
+        # hits are reused; a similar task can name another person or project
+        return prompt, None
         
-        Provide an enhanced description that includes:
-        1. Clear objectives
-        2. Relevant context
-        3. Potential steps or considerations
-        
-        Keep it concise but informative (max 200 words).
-        """
-        
-        try:
-            result = self.ai_client.analyze_with_ai(prompt, 300)
-            return result.strip()
-        except:
-            return original_description or f"Complete the task: {task_title}"
-    
     def get_comprehensive_task_analysis(self, task_title: str, task_description: str,
                                       context_entries: List[Dict] = None,
                                       existing_categories: List[str] = None,
-                                      current_workload: int = 5) -> Dict[str, Any]:
+                                      current_workload: int = 5,
+                                      relevant_contexts: List[Dict] = None) -> Dict[str, Any]:
         """Get comprehensive AI analysis for a task"""
+        # Views are synchronous, so drive the concurrent analysis from here
+        return async_to_sync(self.aget_comprehensive_task_analysis)(
+            task_title, task_description, context_entries,
+            existing_categories, current_workload, relevant_contexts
+        )
+    
+    async def aget_comprehensive_task_analysis(self, task_title: str, task_description: str,
+                                               context_entries: List[Dict] = None,
+                                               existing_categories: List[str] = None,
+                                               current_workload: int = 5,
+                                               relevant_contexts: List[Dict] = None) -> Dict[str, Any]:
+        """Run all task analyses concurrently instead of one LLM call after another
+        
+        Callers backed by the database can pass `relevant_contexts` already ranked
+        by the keyword index, which skips scoring every context entry here.
+        """
         
         # Find relevant contexts
-        relevant_contexts = []
-        if context_entries:
-            task_content = f"{task_title} {task_description}"
-            relevant_contexts = self.context_processor.find_relevant_contexts(
-                task_content, context_entries
-            )
+        if relevant_contexts is None:
+            relevant_contexts = []
+            if context_entries:
+                task_content = f"{task_title} {task_description}"
+                relevant_contexts = self.context_processor.find_relevant_contexts(
+                    task_content, context_entries
+                )
         
         # Run all analyses
+        async with self.ai_client.async_session():
+            priority_score, suggested_deadline, suggested_category, suggested_tags, \
+                enhanced_description = await asyncio.gather(
+                    self.aanalyze_task_priority(
+                        task_title, task_description, context_entries
+                    ),
+                    self.asuggest_deadline(
+                        task_title, task_description, current_workload
+                    ),
+                    self.asuggest_category(
+                        task_title, task_description, existing_categories
+                    ),
+                    self.asuggest_tags(task_title, task_description),
+                    self.aenhance_task_description(
+                        task_title, task_description, relevant_contexts
+                    )
+                )
+        
         analysis = {
-            'priority_score': self.analyze_task_priority(
-                task_title, task_description, context_entries
+            'priority_score': priority_score,
+            'suggested_deadline': suggested_deadline,
+            'suggested_category': suggested_category,
+            'suggested_tags': suggested_tags,
+            'enhanced_description': enhanced_description,
+            'relevant_contexts': relevant_contexts,
+            'analysis_timestamp': datetime.now(timezone.utc).isoformat()
+        }
+        
+        return analysis
+    
+    def analyze_batch(self, tasks: List[Dict], context_entries: List[Dict] = None,
+                      existing_categories: List[str] = None, current_workload: int = 5,
+                      concurrency: int = 32) -> List[Dict[str, Any]]:
+        """Comprehensive analysis for many tasks, e.g. a bulk import or a daily re-rank"""
+        return async_to_sync(self.aanalyze_batch)(
+            tasks, context_entries, existing_categories, current_workload, concurrency
+        )
+    
+    async def aanalyze_batch(self, tasks: List[Dict], context_entries: List[Dict] = None,
+                             existing_categories: List[str] = None, current_workload: int = 5,
+                             concurrency: int = 32) -> List[Dict[str, Any]]:
+        """Batch form of aget_comprehensive_task_analysis
+        
+        `tasks` are dicts with 'title' and 'description'. Tasks are grouped by
+        description length into chunks of _BATCH_SIZE, and each chunk asks for
+        priority, deadline, category and tags in one prompt per question, so N
+        tasks cost 4 * ceil(N / 8) LLM calls instead of 4 * N. Descriptions are
+        free text and are still enhanced one task at a time. At most
+        `concurrency` LLM calls are in flight, so LM Studio and the shared
+        connection pool are not flooded. Results come back in the order of
+        `tasks`.
+        """
+        order = sorted(range(len(tasks)), key=lambda i: len(tasks[i].get('description') or ''))
+        chunks = [order[start:start + _BATCH_SIZE] for start in range(0, len(order), _BATCH_SIZE)]
+        
+        results = [None] * len(tasks)
+        semaphore = asyncio.Semaphore(concurrency)
+        async with self.ai_client.async_session():
+            chunk_results = await asyncio.gather(*(
+                self._aanalyze_chunk(
+                    [tasks[i] for i in chunk], context_entries,
+                    existing_categories, current_workload, semaphore
+                )
+                for chunk in chunks
+            ))
+        for chunk, analyses in zip(chunks, chunk_results):
+            for i, analysis in zip(chunk, analyses):
+                results[i] = analysis
+        return results
+    
+    async def _aanalyze_chunk(self, tasks: List[Dict], context_entries: List[Dict],
+                              existing_categories: List[str], current_workload: int,
+                              semaphore: asyncio.Semaphore) -> List[Dict[str, Any]]:
+        titles = [task.get('title', '') for task in tasks]
+        descriptions = [task.get('description') or '' for task in tasks]
+        
+        relevant = [[] for _ in tasks]
+        if context_entries:
+            relevant = [
+                self.context_processor.find_relevant_contexts(f"{title} {description}", context_entries)
+                for title, description in zip(titles, descriptions)
+            ]
+        
+        # Confident keyword heuristics answer without the LLM, as in the single-task path
+        priorities = [self._calculate_fallback_priority(t, d) for t, d in zip(titles, descriptions)]
+        categories = [self._suggest_fallback_category(t, d) for t, d in zip(titles, descriptions)]
+        tags = [self._suggest_fallback_tags(t, d) for t, d in zip(titles, descriptions)]
+        
+        def unsure(guesses):
+            return [i for i, (_, confidence) in enumerate(guesses) if confidence < _HEURISTIC_CONFIDENCE]
+        
+        batched = await asyncio.gather(
+            self._abatch_answers(
+                'priority', titles, descriptions, unsure(priorities),
+                lambda answer: min(max(float(answer), 0.0), 1.0),
+                lambda i: self.aanalyze_task_priority(titles[i], descriptions[i], context_entries),
+                semaphore, context_info=self._priority_context_info(context_entries)
             ),
-            'suggested_deadline': self.suggest_deadline(
-                task_title, task_description, current_workload
+            self._abatch_answers(
+                'deadline', titles, descriptions, range(len(tasks)),
+                lambda answer: self._parse_deadline(f"{int(answer)} "),
+                lambda i: self.asuggest_deadline(titles[i], descriptions[i], current_workload),
+                semaphore, current_workload=current_workload
             ),
-            'suggested_category': self.suggest_category(
-                task_title, task_description, existing_categories
+            self._abatch_answers(
+                'category', titles, descriptions, unsure(categories),
+                lambda answer: answer.strip().title(),
+                lambda i: self.asuggest_category(titles[i], descriptions[i], existing_categories),
+                semaphore, categories_info=self._categories_info(existing_categories)
             ),
-            'suggested_tags': self.suggest_tags(task_title, task_description),
-            'enhanced_description': self.enhance_task_description(
-                task_title, task_description, relevant_contexts
+            self._abatch_answers(
+                'tags', titles, descriptions, unsure(tags),
+                self._parse_batch_tags,
+                lambda i: self.asuggest_tags(titles[i], descriptions[i]),
+                semaphore
             ),
-            'relevant_contexts': relevant_contexts,
-            'analysis_timestamp': datetime.now().isoformat()
-        }
+            asyncio.gather(*(
+                _limited(semaphore, self.aenhance_task_description(title, description, contexts))
+                for title, description, contexts in zip(titles, descriptions, relevant)
+            ))
+        )
+        batch_priorities, batch_deadlines, batch_categories, batch_tags, enhanced = batched
+        
+        analysis_timestamp = datetime.now(timezone.utc).isoformat()
+        return [
+            {
+                'priority_score': batch_priorities.get(i, priorities[i][0]),
+                'suggested_deadline': batch_deadlines[i],
+                'suggested_category': batch_categories.get(i, categories[i][0]),
+                'suggested_tags': batch_tags.get(i, tags[i][0]),
+                'enhanced_description': enhanced[i],
+                'relevant_contexts': relevant[i],
+                'analysis_timestamp': analysis_timestamp
+            }
+            for i in range(len(tasks))
+        ]
+    
+    async def _abatch_answers(self, kind: str, titles: List[str], descriptions: List[str],
+                              indexes, convert, single, semaphore: asyncio.Semaphore,
+                              **fields) -> Dict[int, Any]:
+        """Ask one question about several tasks at once, keyed by task index
         
-        return analysis
+        Answers that are missing or fail `convert` are retried one task at a
+        time through `single`. Every call waits for a slot in `semaphore`.
+        """
+        indexes = list(indexes)
+        if not indexes:
+            return {}
+        
+        task_list = "\n".join(
+            f"{number}. {titles[i]}: {descriptions[i]}"
+            for number, i in enumerate(indexes, 1)
+        )
+        prompt = _BATCH_PROMPT.format(
+            instruction=_BATCH_INSTRUCTIONS[kind].format(**fields),
+            task_list=task_list, count=len(indexes)
+        )
+        
+        answers = []
+        try:
+            result = await _limited(semaphore, self.ai_client.aanalyze_with_ai(
+                prompt, _BATCH_TOKENS_PER_TASK[kind] * len(indexes)
+            ))
+            answers = orjson.loads(result[result.index('['):result.rindex(']') + 1])
+            if not isinstance(answers, list) or len(answers) != len(indexes):
+                answers = []
+        except Exception:
+            pass
+        
+        converted = {}
+        retry = []
+        for position, i in enumerate(indexes):
+            try:
+                converted[i] = convert(answers[position])
+            except Exception:
+                retry.append(i)
+        
+        if retry:
+            singles = await asyncio.gather(*(_limited(semaphore, single(i)) for i in retry))
+            for i, value in zip(retry, singles):
+                converted[i] = value
+        return converted
     
-    def _calculate_fallback_priority(self, title: str, description: str) -> float:
-        """Fallback priority calculation without AI"""
+    def _calculate_fallback_priority(self, title: str, description: str) -> Tuple[float, float]:
+        """Fallback priority without AI; confident only on a strong keyword that
+        is a whole word and not negated"""
         priority_score = 0.5  # Default
+        confidence = 0.2
         
-        text = f"{title} {description}".lower()
+        text_lower = f"{title} {description}".lower()
+        hits = _FALLBACK_MATCHER.scan(text_lower)
         
         # High priority indicators
-        if any(word in text for word in ['urgent', 'critical', 'asap', 'emergency']):
+        if hits['priority_high']:
             priority_score = 0.9
-        elif any(word in text for word in ['important', 'priority', 'deadline']):
+            if _PRIORITY_HIGH_WORDS.search(_NEGATED_PRIORITY_HIGH.sub(' ', text_lower)):
+                confidence = 0.9
+        elif hits['priority_medium']:
             priority_score = 0.7
-        elif any(word in text for word in ['meeting', 'call', 'presentation']):
+        elif hits['priority_low']:
             priority_score = 0.6
         
-        return priority_score
+        return priority_score, confidence
     
     def _calculate_fallback_deadline(self, description: str) -> datetime:
         """Fallback deadline calculation without AI"""
-        text = description.lower()
-        
-        if any(word in text for word in ['urgent', 'asap', 'today']):
-            return datetime.now() + timedelta(days=1)
-        elif any(word in text for word in ['tomorrow', 'soon']):
-            return datetime.now() + timedelta(days=2)
-        elif any(word in text for word in ['week', 'weekly']):
-            return datetime.now() + timedelta(days=7)
+        hits = _FALLBACK_MATCHER.scan(description.lower())
+        
+        if hits['deadline_1']:
+            return datetime.now(timezone.utc) + _TD_DAYS[1]
+        elif hits['deadline_2']:
+            return datetime.now(timezone.utc) + _TD_DAYS[2]
+        elif hits['deadline_7']:
+            return datetime.now(timezone.utc) + _TD_DAYS[7]
         else:
-            return datetime.now() + timedelta(days=3)
+            return datetime.now(timezone.utc) + _TD_DAYS[3]
     
-    def _suggest_fallback_category(self, title: str, description: str) -> str:
-        """Fallback category suggestion without AI"""
-        text = f"{title} {description}".lower()
-        
-        if any(word in text for word in ['meeting', 'call', 'discuss']):
-            return 'Meetings'
-        elif any(word in text for word in ['code', 'develop', 'program', 'bug', 'feature']):
-            return 'Development'
-        elif any(word in text for word in ['email', 'message', 'contact', 'reply']):
-            return 'Communication'
-        elif any(word in text for word in ['buy', 'purchase', 'shop', 'order']):
-            return 'Shopping'
-        elif any(word in text for word in ['health', 'doctor', 'exercise', 'medical']):
-            return 'Health'
-        elif any(word in text for word in ['clean', 'organize', 'home', 'house']):
-            return 'Personal'
-        else:
-            return 'General'
+    def _suggest_fallback_category(self, title: str, description: str) -> Tuple[str, float]:
+        """Fallback category without AI; confident only when exactly one category
+        matches and it matches a whole word"""
+        text_lower = f"{title} {description}".lower()
+        hits = _FALLBACK_MATCHER.scan(text_lower)
+        
+        matched = [name for name, _ in _FALLBACK_CATEGORIES if hits[('category', name)]]
+        if not matched:
+            return 'General', 0.2
+        if len(matched) == 1 and _FALLBACK_WORDS[('category', matched[0])].search(text_lower):
+            return matched[0], 0.9
+        return matched[0], 0.2
     
-    def _suggest_fallback_tags(self, title: str, description: str) -> List[str]:
-        """Fallback tag suggestion without AI"""
-        text = f"{title} {description}".lower()
-        tags = []
-        
-        if any(word in text for word in ['urgent', 'asap', 'critical']):
-            tags.append('urgent')
-        if any(word in text for word in ['meeting', 'call']):
-            tags.append('meeting')
-        if any(word in text for word in ['work', 'office', 'project']):
-            tags.append('work')
-        if any(word in text for word in ['personal', 'home', 'family']):
-            tags.append('personal')
-        if any(word in text for word in ['follow-up', 'followup', 'follow']):
-            tags.append('follow-up')
+    def _suggest_fallback_tags(self, title: str, description: str) -> Tuple[List[str], float]:
+        """Fallback tags without AI; confident when enough tags match whole words"""
+        text_lower = f"{title} {description}".lower()
+        hits = _FALLBACK_MATCHER.scan(text_lower)
+        tags = [name for name, _ in _FALLBACK_TAGS if hits[('tag', name)]]
         
         # Add generic tag if no specific ones found
         if not tags:
-            tags.append('task')
+            return ['task'], 0.2
         
-        return tags[:3]
\ No newline at end of file
+        whole_word_tags = [tag for tag in tags if _FALLBACK_WORDS[('tag', tag)].search(text_lower)]
+        confidence = 0.9 if len(whole_word_tags) >= _CONFIDENT_TAG_COUNT else 0.2
+        return tags[:3], confidence
+
+@functools.lru_cache(maxsize=1)
+def get_task_analyzer() -> TaskAnalyzer:
+    """Process-wide TaskAnalyzer; it keeps no per-call state, so requests and jobs share it"""
+    return TaskAnalyzer()
\ No newline at end of file
@@ -0,0 +1,13 @@
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smart_todo.settings')
+
+app = Celery('smart_todo')
+
+# All Celery settings live in settings.py with a CELERY_ prefix
+app.config_from_object('django.conf:settings', namespace='CELERY')
+
+# Task modules are tasks/celery_tasks.py, since tasks/ is the app itself
+app.autodiscover_tasks(related_name='celery_tasks')
\ No newline at end of file
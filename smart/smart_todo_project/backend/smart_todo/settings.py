@@ -1,5 +1,7 @@
 import os
 from pathlib import Path
+from urllib.parse import urlsplit
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,6 +21,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'corsheaders',
     'tasks',
@@ -104,4 +107,42 @@ CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:3000",
 ]
 
-CORS_ALLOW_CREDENTIALS = True
\ No newline at end of file
+CORS_ALLOW_CREDENTIALS = True
+
+# Celery settings
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+# Run tasks inside the web process instead of a worker, e.g. without a broker in development
+CELERY_TASK_ALWAYS_EAGER = os.getenv('CELERY_TASK_ALWAYS_EAGER', 'False').lower() == 'true'
+# Eager jobs finish inside the request, so their results are kept in process
+# memory for analysis_status rather than in a Redis that may not be running
+CELERY_RESULT_BACKEND = os.getenv(
+    'CELERY_RESULT_BACKEND', 'cache+memory://' if CELERY_TASK_ALWAYS_EAGER else CELERY_BROKER_URL
+)
+CELERY_TASK_STORE_EAGER_RESULT = CELERY_TASK_ALWAYS_EAGER
+CELERY_TASK_TRACK_STARTED = True
+CELERY_TASK_ROUTES = {
+    'tasks.celery_tasks.*': {'queue': 'ai_queue'},  # Workers that run the AI analysis
+}
+
+# Cache settings. Celery workers bump the cache keys that invalidate cached
+# analyses and task lists, so the cache must be shared with them: Redis from
+# REDIS_CACHE_URL, else db 1 on the Redis broker. Local memory is only safe
+# when tasks run eagerly inside the web process.
+REDIS_CACHE_URL = os.getenv('REDIS_CACHE_URL')
+if not REDIS_CACHE_URL and not CELERY_TASK_ALWAYS_EAGER:
+    broker = urlsplit(CELERY_BROKER_URL)
+    if broker.scheme not in ('redis', 'rediss'):
+        raise ImproperlyConfigured(
+            'Set REDIS_CACHE_URL when CELERY_BROKER_URL is not Redis, '
+            'or CELERY_TASK_ALWAYS_EAGER=True to use a local memory cache'
+        )
+    REDIS_CACHE_URL = broker._replace(path='/1').geturl()
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_CACHE_URL,
+    } if REDIS_CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
\ No newline at end of file
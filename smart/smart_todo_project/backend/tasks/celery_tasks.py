@@ -0,0 +1,235 @@
+from celery import group, shared_task
+from django.core.cache import cache
+from django.utils import timezone
+from ai_module.task_analyzer import get_task_analyzer
+from ai_module.context_processor import get_context_processor
+from .models import Task, Category, ContextEntry, TaskContextLink
+from .signals import bump_context_version, category_cache_key
+
+def _report_progress(task, step, **meta):
+    """Publish a PROGRESS state the frontend can poll through analysis_status"""
+    if not task.request.is_eager:
+        task.update_state(state='PROGRESS', meta={'step': step, **meta})
+
+def _analyze_task(title, description):
+    """Comprehensive AI analysis of a task against the last 7 days of context"""
+    analyzer = get_task_analyzer()
+    
+    # Get existing categories for suggestions
+    existing_categories = list(Category.objects.values_list('name', flat=True))
+    
+    # Get recent context entries (last 7 days)
+    recent_contexts = ContextEntry.objects.recent()
+    context_data = recent_contexts.context_data()
+    relevant_contexts = recent_contexts.relevant_to(
+        analyzer.context_processor.extract_keywords(f"{title} {description}")
+    )
+    
+    return analyzer.get_comprehensive_task_analysis(
+        title,
+        description,
+        context_data,
+        existing_categories,
+        relevant_contexts=relevant_contexts
+    )
+
+# Renamed categories drop out of the name cache after this long
+CATEGORY_CACHE_SECONDS = 3600
+
+def _suggested_category_id(analysis):
+    """Id of the suggested category, creating it on first use"""
+    suggested_category = analysis['suggested_category']
+    if not suggested_category:
+        return None
+    
+    key = category_cache_key(suggested_category)
+    category_id = cache.get(key)
+    if category_id is None:
+        categories = Category.objects.filter(name=suggested_category)
+        category_id = categories.values_list('id', flat=True).first()
+        if category_id is None:
+            # Insert-or-skip in one statement, so concurrent jobs can't race on the name
+            Category.objects.bulk_create(
+                [Category(name=suggested_category, color='#3B82F6')], ignore_conflicts=True
+            )
+            bump_context_version()  # a new category; bulk_create sends no post_save
+            category_id = categories.values_list('id', flat=True).get()
+        cache.set(key, category_id, CATEGORY_CACHE_SECONDS)
+    return category_id
+
+# Fields the AI enrichment writes; saved alone so edits made meanwhile are kept
+_AI_FIELDS = [
+    'ai_priority_score', 'ai_suggested_deadline', 'ai_suggested_tags',
+    'description', 'context_based_notes', 'category', 'updated_at'
+]
+
+@shared_task(bind=True)
+def enrich_task(self, task_id):
+    """Apply AI suggestions to a newly created task"""
+    task = Task.objects.get(id=task_id)
+    
+    _report_progress(self, 'analyzing', task_id=task_id)
+    analysis = _analyze_task(task.title, task.description)
+    
+    # Apply AI suggestions
+    _report_progress(self, 'saving', task_id=task_id)
+    task.ai_priority_score = analysis['priority_score']
+    task.ai_suggested_deadline = analysis['suggested_deadline']
+    task.ai_suggested_tags = ','.join(analysis['suggested_tags'])
+    
+    # Enhance description if original is short
+    if len(task.description or '') < 50:
+        task.description = analysis['enhanced_description']
+    
+    task.context_based_notes = f"AI Analysis: Priority {analysis['priority_score']:.2f}, " \
+                             f"Suggested deadline: {analysis['suggested_deadline'].strftime('%Y-%m-%d')}"
+    
+    # Set or create category
+    task.category_id = _suggested_category_id(analysis) or task.category_id
+    task.save(update_fields=_AI_FIELDS)
+    
+    return {'task_id': task_id, 'priority_score': analysis['priority_score']}
+
+def _apply_reanalysis(task, analysis):
+    """Save a re-analysis on the task and link the contexts it used"""
+    task.ai_priority_score = analysis['priority_score']
+    task.ai_suggested_deadline = analysis['suggested_deadline']
+    task.ai_suggested_tags = ','.join(analysis['suggested_tags'])
+    task.description = analysis['enhanced_description']
+    task.context_based_notes = f"Re-analyzed on {timezone.now().strftime('%Y-%m-%d %H:%M')}: " \
+                              f"Priority {analysis['priority_score']:.2f}"
+    
+    # Link relevant contexts that still exist, upserting every link in one query
+    relevant_contexts = analysis['relevant_contexts']
+    existing_ids = set(ContextEntry.objects.filter(
+        id__in=[rel_ctx['context']['id'] for rel_ctx in relevant_contexts]
+    ).values_list('id', flat=True))
+    TaskContextLink.objects.bulk_create(
+        [
+            TaskContextLink(
+                task=task,
+                context_entry_id=rel_ctx['context']['id'],
+                relevance_score=rel_ctx['relevance_score']
+            )
+            for rel_ctx in relevant_contexts
+            if rel_ctx['context']['id'] in existing_ids
+        ],
+        update_conflicts=True,
+        unique_fields=['task', 'context_entry'],
+        update_fields=['relevance_score']
+    )
+    
+    # Update category if suggested
+    task.category_id = _suggested_category_id(analysis) or task.category_id
+    
+    # Saved after linking, so representations cached by updated_at include the links
+    task.save(update_fields=_AI_FIELDS)
+
+@shared_task(bind=True)
+def reanalyze_task(self, task_id):
+    """Re-run AI analysis on an existing task and link the contexts it used"""
+    task = Task.objects.get(id=task_id)
+    
+    _report_progress(self, 'analyzing', task_id=task_id)
+    analysis = _analyze_task(task.title, task.original_description or task.description)
+    
+    _report_progress(self, 'saving', task_id=task_id)
+    _apply_reanalysis(task, analysis)
+    
+    return {'task_id': task_id, 'priority_score': analysis['priority_score']}
+
+# Tasks re-analyzed per job; analyze_batch sends them 8 to a prompt
+TASK_BATCH_SIZE = 64
+
+@shared_task(bind=True)
+def reanalyze_task_batch(self, task_ids):
+    """Re-run AI analysis on several tasks with batched prompts, e.g. a daily re-rank"""
+    tasks = list(Task.objects.filter(id__in=task_ids))
+    
+    _report_progress(self, 'analyzing', task_count=len(tasks))
+    analyses = get_task_analyzer().analyze_batch(
+        [
+            {'title': task.title, 'description': task.original_description or task.description}
+            for task in tasks
+        ],
+        ContextEntry.objects.recent().context_data(),
+        list(Category.objects.values_list('name', flat=True))
+    )
+    
+    _report_progress(self, 'saving', task_count=len(tasks))
+    for task, analysis in zip(tasks, analyses):
+        _apply_reanalysis(task, analysis)
+    
+    return {'task_ids': [task.id for task in tasks]}
+
+def dispatch_task_batches(task_ids):
+    """Re-analyze tasks in parallel across workers, TASK_BATCH_SIZE per job"""
+    job = group(
+        reanalyze_task_batch.s(task_ids[start:start + TASK_BATCH_SIZE])
+        for start in range(0, len(task_ids), TASK_BATCH_SIZE)
+    ).apply_async()
+    
+    # Keep the group in the result backend so analysis_status can find it
+    job.save()
+    return job
+
+@shared_task(bind=True)
+def process_context(self, entry_id):
+    """Extract AI insights for a saved context entry"""
+    context_entry = ContextEntry.objects.get(id=entry_id)
+    
+    _report_progress(self, 'analyzing', entry_id=entry_id)
+    processor = get_context_processor()
+    insights = processor.process_context_entry(
+        context_entry.content,
+        context_entry.source_type
+    )
+    
+    # Update the entry with processed insights
+    context_entry.processed_insights = insights
+    context_entry.keywords = insights['keywords']
+    context_entry.sentiment_score = insights['sentiment_score']
+    context_entry.priority_indicators = insights['priority_indicators']
+    context_entry.save(update_fields=[
+        'processed_insights', 'keywords', 'sentiment_score', 'priority_indicators'
+    ])
+    bump_context_version()
+    
+    return {'entry_id': entry_id, 'urgency_level': insights['urgency_level']}
+
+# Entries per process_context_batch job when a bulk import is fanned out
+CONTEXT_BATCH_SIZE = 32
+
+@shared_task(bind=True)
+def process_context_batch(self, entry_ids):
+    """Extract AI insights for several saved context entries in one batch"""
+    entries = list(ContextEntry.objects.filter(id__in=entry_ids))
+    
+    _report_progress(self, 'analyzing', entry_count=len(entries))
+    processor = get_context_processor()
+    batch_insights = processor.process_context_batch([
+        (entry.content, entry.source_type) for entry in entries
+    ])
+    
+    for entry, insights in zip(entries, batch_insights):
+        entry.processed_insights = insights
+        entry.keywords = insights['keywords']
+        entry.sentiment_score = insights['sentiment_score']
+        entry.priority_indicators = insights['priority_indicators']
+    ContextEntry.objects.bulk_update(entries, [
+        'processed_insights', 'keywords', 'sentiment_score', 'priority_indicators'
+    ])
+    bump_context_version()
+    
+    return {'entry_ids': [entry.id for entry in entries]}
+
+def dispatch_context_batches(entry_ids):
+    """Process entries in parallel across workers, CONTEXT_BATCH_SIZE per job"""
+    job = group(
+        process_context_batch.s(entry_ids[start:start + CONTEXT_BATCH_SIZE])
+        for start in range(0, len(entry_ids), CONTEXT_BATCH_SIZE)
+    ).apply_async()
+    
+    # Keep the group in the result backend so analysis_status can find it
+    job.save()
+    return job
\ No newline at end of file
@@ -0,0 +1,23 @@
+import orjson
+from django.db import models
+from django.db.backends.postgresql.psycopg_any import Jsonb
+
+def _orjson_dumps(value):
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+class OrjsonField(models.JSONField):
+    """JSONField that encodes and decodes with orjson instead of the stdlib json module"""
+    
+    def from_db_value(self, value, expression, connection):
+        # Key transforms can come back already decoded
+        if not isinstance(value, (str, bytes)):
+            return value
+        try:
+            return orjson.loads(value)
+        except orjson.JSONDecodeError:
+            return value
+    
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        return Jsonb(value, dumps=_orjson_dumps)
\ No newline at end of file
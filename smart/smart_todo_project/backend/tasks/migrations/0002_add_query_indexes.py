@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-15 22:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contextentry',
+            index=models.Index(fields=['user', '-timestamp'], name='tasks_conte_user_id_d55319_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contextentry',
+            index=models.Index(fields=['source_type', '-timestamp'], name='tasks_conte_source__578b23_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['-ai_priority_score', '-created_at'], name='tasks_task_ai_prio_284a1b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'status'], name='tasks_task_user_id_c0fce1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['deadline'], name='tasks_task_deadlin_736196_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskcontextlink',
+            index=models.Index(fields=['task', '-relevance_score'], name='tasks_taskc_task_id_c30571_idx'),
+        ),
+    ]
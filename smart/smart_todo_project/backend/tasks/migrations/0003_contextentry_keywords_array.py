@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-15 22:06
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_add_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # A plain ALTER TYPE cannot cast 'a,b,c' to text[], so split the stored
+        # comma-separated keywords explicitly (and join them back on reverse).
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql=(
+                        "ALTER TABLE tasks_contextentry ALTER COLUMN keywords TYPE text[] "
+                        "USING CASE WHEN keywords = '' THEN '{}'::text[] "
+                        "ELSE string_to_array(keywords, ',') END"
+                    ),
+                    reverse_sql=(
+                        "ALTER TABLE tasks_contextentry ALTER COLUMN keywords TYPE varchar(500) "
+                        "USING array_to_string(keywords, ',')"
+                    ),
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='contextentry',
+                    name='keywords',
+                    field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), blank=True, default=list, size=None),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='contextentry',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['keywords'], name='tasks_conte_keyword_d56cbf_gin'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-15 22:15
+
+import tasks.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_contextentry_keywords_array'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contextentry',
+            name='priority_indicators',
+            field=tasks.fields.OrjsonField(default=list),
+        ),
+        migrations.AlterField(
+            model_name='contextentry',
+            name='processed_insights',
+            field=tasks.fields.OrjsonField(default=dict),
+        ),
+    ]
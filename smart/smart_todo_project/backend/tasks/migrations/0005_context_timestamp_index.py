@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-15 22:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_contextentry_orjson_fields'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contextentry',
+            index=models.Index(fields=['-timestamp'], name='tasks_conte_timesta_2643a2_idx'),
+        ),
+    ]
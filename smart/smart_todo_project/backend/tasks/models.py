@@ -1,6 +1,12 @@
 from django.db import models
+from django.db.models import F, Func, Value
+from django.db.models.functions import Cast
 from django.contrib.auth.models import User
-from datetime import datetime, timedelta
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.utils import timezone
+from datetime import timedelta
+from .fields import OrjsonField
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -49,15 +55,89 @@ class Task(models.Model):
     
     class Meta:
         ordering = ['-ai_priority_score', '-created_at']
+        indexes = [
+            models.Index(fields=['-ai_priority_score', '-created_at']),  # default list order
+            models.Index(fields=['user', 'status']),
+            models.Index(fields=['deadline']),
+        ]
     
     def save(self, *args, **kwargs):
         if self.status == 'COMPLETED' and not self.completed_at:
-            self.completed_at = datetime.now()
+            self.completed_at = timezone.now()
         super().save(*args, **kwargs)
     
     def __str__(self):
         return self.title
 
+class ArrayIntersect(Func):
+    """Elements two text arrays have in common, as a text array"""
+    arity = 2
+    template = 'ARRAY(SELECT unnest(%(expressions)s))'
+    arg_joiner = ') INTERSECT SELECT unnest('
+    output_field = ArrayField(models.TextField())
+
+class ContextEntryQuerySet(models.QuerySet):
+    def recent(self, days=7):
+        """Entries created in the last `days` days"""
+        return self.filter(created_at__gte=timezone.now() - timedelta(days=days))
+    
+    def context_data(self):
+        """Entries as ContextEntry.as_context_data dicts, fetched as plain rows
+
+        Only the columns the analyzers read are selected, and urgency_level is
+        pulled out of processed_insights in SQL, so no model instances are built.
+        """
+        rows = self.values_list(
+            'id', 'content', 'keywords', 'processed_insights__urgency_level', 'sentiment_score'
+        )
+        return [
+            {
+                'id': entry_id,
+                'content': content,
+                'keywords': keywords,
+                'urgency_level': urgency_level or 1,
+                'sentiment_score': sentiment_score or 0.5
+            }
+            for entry_id, content, keywords, urgency_level, sentiment_score in rows
+        ]
+    
+    def overlapping_keywords(self, keywords):
+        """Entries sharing keywords with the list, most shared first
+
+        The overlap filter is served by the GIN index on keywords; the shared
+        keywords and their count are computed in SQL as matching_keywords and
+        overlap_size.
+        """
+        keywords = list(keywords)
+        return self.filter(keywords__overlap=keywords).annotate(
+            matching_keywords=ArrayIntersect(
+                F('keywords'), Cast(Value(keywords), ArrayField(models.TextField()))
+            )
+        ).annotate(
+            overlap_size=Func(
+                F('matching_keywords'), function='cardinality',
+                output_field=models.IntegerField()
+            )
+        ).order_by('-overlap_size', '-timestamp')
+    
+    def relevant_to(self, keywords, limit=5):
+        """Most relevant entries in the shape ContextProcessor.find_relevant_contexts returns"""
+        keywords = list(keywords)
+        if not keywords:
+            return []
+        
+        entries = self.overlapping_keywords(keywords).filter(
+            overlap_size__gt=len(keywords) * 0.1  # Minimum relevance threshold
+        )[:limit]
+        return [
+            {
+                'context': entry.as_context_data(),
+                'relevance_score': entry.overlap_size / len(keywords),
+                'matching_keywords': entry.matching_keywords
+            }
+            for entry in entries
+        ]
+
 class ContextEntry(models.Model):
     SOURCE_CHOICES = [
         ('WHATSAPP', 'WhatsApp'),
@@ -71,18 +151,36 @@ class ContextEntry(models.Model):
     source_type = models.CharField(max_length=20, choices=SOURCE_CHOICES)
     sender = models.CharField(max_length=200, blank=True)  # Who sent the message/email
     timestamp = models.DateTimeField()
-    processed_insights = models.JSONField(default=dict)  # Store AI-extracted insights
-    keywords = models.CharField(max_length=500, blank=True)  # Extracted keywords
+    processed_insights = OrjsonField(default=dict)  # Store AI-extracted insights
+    keywords = ArrayField(models.TextField(), default=list, blank=True)  # Extracted keywords
     sentiment_score = models.FloatField(null=True, blank=True)  # Sentiment analysis
-    priority_indicators = models.JSONField(default=list)  # Words/phrases indicating priority
+    priority_indicators = OrjsonField(default=list)  # Words/phrases indicating priority
     created_at = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, default=1)
     
+    objects = ContextEntryQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['-timestamp']),  # context feed pages
+            models.Index(fields=['user', '-timestamp']),
+            models.Index(fields=['source_type', '-timestamp']),
+            GinIndex(fields=['keywords']),
+        ]
     
     def __str__(self):
         return f"{self.source_type} - {self.timestamp.strftime('%Y-%m-%d %H:%M')}"
+    
+    def as_context_data(self):
+        """Plain dict form of the entry used by the AI analyzers"""
+        return {
+            'id': self.id,
+            'content': self.content,
+            'keywords': self.keywords,
+            'urgency_level': self.processed_insights.get('urgency_level', 1),
+            'sentiment_score': self.sentiment_score or 0.5
+        }
 
 class TaskContextLink(models.Model):
     """Links tasks to relevant context entries"""
@@ -92,4 +190,7 @@ class TaskContextLink(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
-        unique_together = ['task', 'context_entry']
\ No newline at end of file
+        unique_together = ['task', 'context_entry']
+        indexes = [
+            models.Index(fields=['task', '-relevance_score']),
+        ]
\ No newline at end of file
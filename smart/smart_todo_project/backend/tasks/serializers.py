@@ -1,6 +1,16 @@
 from rest_framework import serializers
+from django.core.cache import cache
+from django.db import models
 from .models import Task, Category, ContextEntry, TaskContextLink
-from ai_module.task_analyzer import TaskAnalyzer
+from .celery_tasks import enrich_task
+from .signals import context_version
+
+# How long a rendered task is reused by TaskListSerializer
+TASK_REPR_CACHE_SECONDS = 300
+
+def _split_tags(value):
+    """Non-blank entries of a comma-separated string, each stripped once"""
+    return [tag for tag in map(str.strip, value.split(',')) if tag]
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -8,14 +18,21 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'color', 'usage_count', 'created_at']
 
 class ContextEntrySerializer(serializers.ModelSerializer):
+    keywords = serializers.SerializerMethodField()
+    analysis_job_id = serializers.CharField(read_only=True)
+    
     class Meta:
         model = ContextEntry
         fields = [
             'id', 'content', 'source_type', 'sender', 'timestamp',
             'processed_insights', 'keywords', 'sentiment_score',
-            'priority_indicators', 'created_at'
+            'priority_indicators', 'created_at', 'analysis_job_id'
         ]
         read_only_fields = ['processed_insights', 'keywords', 'sentiment_score', 'priority_indicators']
+    
+    def get_keywords(self, obj):
+        # Stored as a text[] array; the API keeps exposing a comma-separated string
+        return ','.join(obj.keywords)
 
 class TaskContextLinkSerializer(serializers.ModelSerializer):
     context_entry = ContextEntrySerializer(read_only=True)
@@ -24,6 +41,32 @@ class TaskContextLinkSerializer(serializers.ModelSerializer):
         model = TaskContextLink
         fields = ['id', 'context_entry', 'relevance_score', 'created_at']
 
+class TaskListSerializer(serializers.ListSerializer):
+    """Reuse cached representations of unchanged tasks in list responses
+
+    A task's entry is keyed on its updated_at and on the context version, which
+    moves when categories or context entries (shown nested) change. Lookups
+    and stores take one cache round trip each for the whole page.
+    """
+    
+    def to_representation(self, data):
+        tasks = data.all() if isinstance(data, models.manager.BaseManager) else data
+        version = context_version()
+        keys = [
+            f"task_repr:{task.pk}:{task.updated_at.timestamp()}:{version}"
+            for task in tasks
+        ]
+        cached = cache.get_many(keys)
+        
+        rendered = {}
+        for task, key in zip(tasks, keys):
+            if key not in cached:
+                rendered[key] = cached[key] = self.child.to_representation(task)
+        if rendered:
+            cache.set_many(rendered, TASK_REPR_CACHE_SECONDS)
+        
+        return [cached[key] for key in keys]
+
 class TaskSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     related_contexts = TaskContextLinkSerializer(
@@ -43,25 +86,24 @@ class TaskSerializer(serializers.ModelSerializer):
             'context_based_notes', 'created_at', 'updated_at',
             'completed_at', 'related_contexts'
         ]
+        list_serializer_class = TaskListSerializer
     
     def get_tags_list(self, obj):
-        if obj.tags:
-            return [tag.strip() for tag in obj.tags.split(',') if tag.strip()]
-        return []
+        return _split_tags(obj.tags)
     
     def get_ai_suggested_tags_list(self, obj):
-        if obj.ai_suggested_tags:
-            return [tag.strip() for tag in obj.ai_suggested_tags.split(',') if tag.strip()]
-        return []
+        return _split_tags(obj.ai_suggested_tags)
 
 class TaskCreateSerializer(serializers.ModelSerializer):
     use_ai_enhancement = serializers.BooleanField(default=True, write_only=True)
+    analysis_job_id = serializers.CharField(read_only=True)
     
     class Meta:
         model = Task
         fields = [
-            'title', 'description', 'category', 'priority',
-            'deadline', 'estimated_duration', 'tags', 'use_ai_enhancement'
+            'id', 'title', 'description', 'category', 'priority',
+            'deadline', 'estimated_duration', 'tags', 'use_ai_enhancement',
+            'analysis_job_id'
         ]
     
     def create(self, validated_data):
@@ -71,57 +113,12 @@ class TaskCreateSerializer(serializers.ModelSerializer):
         # Store original description
         task.original_description = task.description
         
+        task.save()
+        
         if use_ai:
-            # Get AI analysis
-            analyzer = TaskAnalyzer()
-            
-            # Get existing categories for suggestions
-            existing_categories = list(Category.objects.values_list('name', flat=True))
-            
-            # Get recent context entries (last 7 days)
-            from datetime import datetime, timedelta
-            recent_contexts = ContextEntry.objects.filter(
-                created_at__gte=datetime.now() - timedelta(days=7)
-            )
-            context_data = []
-            for ctx in recent_contexts:
-                context_data.append({
-                    'content': ctx.content,
-                    'keywords': ctx.keywords.split(',') if ctx.keywords else [],
-                    'urgency_level': ctx.processed_insights.get('urgency_level', 1),
-                    'sentiment_score': ctx.sentiment_score or 0.5
-                })
-            
-            # Get comprehensive analysis
-            analysis = analyzer.get_comprehensive_task_analysis(
-                task.title,
-                task.description,
-                context_data,
-                existing_categories
-            )
-            
-            # Apply AI suggestions
-            task.ai_priority_score = analysis['priority_score']
-            task.ai_suggested_deadline = analysis['suggested_deadline']
-            task.ai_suggested_tags = ','.join(analysis['suggested_tags'])
-            
-            # Enhance description if original is short
-            if len(task.description or '') < 50:
-                task.description = analysis['enhanced_description']
-            
-            task.context_based_notes = f"AI Analysis: Priority {analysis['priority_score']:.2f}, " \
-                                     f"Suggested deadline: {analysis['suggested_deadline'].strftime('%Y-%m-%d')}"
-            
-            # Set or create category
-            suggested_category = analysis['suggested_category']
-            if suggested_category:
-                category, created = Category.objects.get_or_create(
-                    name=suggested_category,
-                    defaults={'color': '#3B82F6'}
-                )
-                task.category = category
+            # AI enrichment runs on a Celery worker; the task is returned right away
+            task.analysis_job_id = enrich_task.delay(task.id).id
         
-        task.save()
         return task
 
 class TaskAIAnalysisSerializer(serializers.Serializer):
@@ -0,0 +1,33 @@
+import hashlib
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Category, ContextEntry
+
+# Bumped whenever context entries or categories change, so cached ai_analysis
+# responses and task representations keyed on it stop matching
+CONTEXT_VERSION_KEY = 'ai:context_version'
+
+def category_cache_key(name):
+    """Cache key for the id of the category with this name"""
+    return 'category:id:' + hashlib.sha256(name.encode('utf-8')).hexdigest()
+
+def context_version():
+    """Current version of the context used by AI analysis"""
+    return cache.get_or_set(CONTEXT_VERSION_KEY, 0, timeout=None)
+
+def bump_context_version():
+    """Invalidate cached AI analysis; call after bulk writes, which send no signals"""
+    try:
+        cache.incr(CONTEXT_VERSION_KEY)
+    except ValueError:
+        cache.set(CONTEXT_VERSION_KEY, 1, timeout=None)
+
+@receiver([post_save, post_delete], sender=ContextEntry)
+@receiver([post_save, post_delete], sender=Category)
+def context_changed(sender, **kwargs):
+    bump_context_version()
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    cache.delete(category_cache_key(instance.name))
\ No newline at end of file
@@ -1,3 +1,876 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from unittest import mock, skipUnless
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from ai_module.ai_client import AsyncAIClient
+from ai_module.context_processor import ContextProcessor, _DATE_RE
+from ai_module.keyword_matcher import KeywordMatcher, RECORD_SEPARATOR, join_records, record_index
+from ai_module.semantic_cache import SemanticCache
+from ai_module.task_analyzer import TaskAnalyzer
+from tasks.celery_tasks import CONTEXT_BATCH_SIZE, _suggested_category_id, reanalyze_task
+from tasks.models import Category, ContextEntry, Task, TaskContextLink
+from tasks.serializers import TaskSerializer
+from tasks.signals import context_version
 
-# Create your tests here.
+# Words the generated texts are built from: every heuristic keyword, words that
+# contain one without being it, dates and times, and filler
+_VOCABULARY = [
+    'good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic', 'love', 'like',
+    'enjoy', 'happy', 'excited', 'pleased', 'satisfied', 'bad', 'terrible', 'awful',
+    'hate', 'dislike', 'angry', 'frustrated', 'upset', 'annoyed', 'disappointed',
+    'worried', 'stressed', 'urgent', 'asap', 'immediately', 'deadline', 'due',
+    'important', 'critical', 'priority', 'rush', 'emergency', 'today', 'tomorrow',
+    'now', 'tonight', 'this week', 'by', 'meeting', 'call', 'discuss', 'code',
+    'develop', 'program', 'bug', 'feature', 'email', 'message', 'contact', 'reply',
+    'buy', 'purchase', 'shop', 'order', 'health', 'doctor', 'exercise', 'medical',
+    'clean', 'organize', 'home', 'house', 'work', 'office', 'project', 'personal',
+    'family', 'follow-up', 'followup', 'follow', 'presentation', 'soon', 'week',
+    'weekly', 'recall', 'homework', 'network', 'following', 'nowhere', 'byte',
+    'unlikely', 'disorder', 'Urgent', 'ASAP', 'Today', 'budget', 'report', 'client',
+    'the', 'and', 'with', 'quarterly', '12/31/2025', '2025-12-31', '1-2-2024',
+    '10:30', '9:05 pm', 'friday', 'next month', '!', '!!', ',', '.',
+]
+
+def _random_texts(count, seed=7):
+    rng = random.Random(seed)
+    return [' '.join(rng.choices(_VOCABULARY, k=rng.randint(0, 25))) for _ in range(count)]
+
+# Reference copies of the heuristics as they were before the keyword matcher,
+# one substring test per keyword; the current code must give the same answers
+
+def _baseline_sentiment(text):
+    positive_words = [
+        'good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic',
+        'love', 'like', 'enjoy', 'happy', 'excited', 'pleased', 'satisfied'
+    ]
+    negative_words = [
+        'bad', 'terrible', 'awful', 'hate', 'dislike', 'angry', 'frustrated',
+        'upset', 'annoyed', 'disappointed', 'worried', 'stressed', 'urgent'
+    ]
+    text_lower = text.lower()
+    positive_score = sum(1 for word in positive_words if word in text_lower)
+    negative_score = sum(1 for word in negative_words if word in text_lower)
+    total_score = positive_score + negative_score
+    if total_score == 0:
+        return 0.5
+    return positive_score / total_score
+
+def _baseline_priority_indicators(text):
+    priority_keywords = [
+        'urgent', 'asap', 'immediately', 'deadline', 'due', 'important',
+        'critical', 'priority', 'rush', 'emergency', 'today', 'tomorrow'
+    ]
+    text_lower = text.lower()
+    return [keyword for keyword in priority_keywords if keyword in text_lower]
+
+def _baseline_has_deadline_mention(text):
+    return any(word in text.lower() for word in ['deadline', 'due', 'by'])
+
+def _baseline_urgency(text):
+    urgency_score = 1
+    text_lower = text.lower()
+    if any(word in text_lower for word in ['urgent', 'asap', 'immediately', 'emergency']):
+        urgency_score += 4
+    if any(word in text_lower for word in ['important', 'priority', 'deadline']):
+        urgency_score += 2
+    if any(word in text_lower for word in ['today', 'now', 'tonight']):
+        urgency_score += 3
+    elif any(word in text_lower for word in ['tomorrow', 'this week']):
+        urgency_score += 2
+    urgency_score += min(text.count('!'), 2)
+    return min(urgency_score, 10)
+
+def _baseline_keyword_candidates(text):
+    stop_words = {
+        'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+        'of', 'with', 'by', 'from', 'as', 'is', 'are', 'was', 'were', 'be',
+        'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
+        'would', 'could', 'should', 'may', 'might', 'can', 'this', 'that',
+        'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they'
+    }
+    words = re.sub(r'[^\w\s]', ' ', text.lower()).split()
+    return {word for word in words if len(word) > 2 and word not in stop_words}
+
+def _baseline_fallback_priority(title, description):
+    text = f"{title} {description}".lower()
+    if any(word in text for word in ['urgent', 'critical', 'asap', 'emergency']):
+        return 0.9
+    elif any(word in text for word in ['important', 'priority', 'deadline']):
+        return 0.7
+    elif any(word in text for word in ['meeting', 'call', 'presentation']):
+        return 0.6
+    return 0.5
+
+def _baseline_fallback_deadline_days(description):
+    text = description.lower()
+    if any(word in text for word in ['urgent', 'asap', 'today']):
+        return 1
+    elif any(word in text for word in ['tomorrow', 'soon']):
+        return 2
+    elif any(word in text for word in ['week', 'weekly']):
+        return 7
+    return 3
+
+def _baseline_fallback_category(title, description):
+    text = f"{title} {description}".lower()
+    if any(word in text for word in ['meeting', 'call', 'discuss']):
+        return 'Meetings'
+    elif any(word in text for word in ['code', 'develop', 'program', 'bug', 'feature']):
+        return 'Development'
+    elif any(word in text for word in ['email', 'message', 'contact', 'reply']):
+        return 'Communication'
+    elif any(word in text for word in ['buy', 'purchase', 'shop', 'order']):
+        return 'Shopping'
+    elif any(word in text for word in ['health', 'doctor', 'exercise', 'medical']):
+        return 'Health'
+    elif any(word in text for word in ['clean', 'organize', 'home', 'house']):
+        return 'Personal'
+    return 'General'
+
+def _baseline_fallback_tags(title, description):
+    text = f"{title} {description}".lower()
+    tags = []
+    if any(word in text for word in ['urgent', 'asap', 'critical']):
+        tags.append('urgent')
+    if any(word in text for word in ['meeting', 'call']):
+        tags.append('meeting')
+    if any(word in text for word in ['work', 'office', 'project']):
+        tags.append('work')
+    if any(word in text for word in ['personal', 'home', 'family']):
+        tags.append('personal')
+    if any(word in text for word in ['follow-up', 'followup', 'follow']):
+        tags.append('follow-up')
+    if not tags:
+        tags.append('task')
+    return tags[:3]
+
+class KeywordMatcherTests(SimpleTestCase):
+    buckets = {
+        'tags': ['follow', 'follow-up', 'call'],
+        'urgent': ['urgent', 'asap'],
+        'shared': ['call', 'now'],
+    }
+    
+    def expected(self, text_lower):
+        return {
+            bucket: {keyword for keyword in keywords if keyword in text_lower}
+            for bucket, keywords in self.buckets.items()
+        }
+    
+    def found(self, hits):
+        return {bucket: set(hits[bucket]) for bucket in self.buckets}
+    
+    def test_scan_matches_substring_membership(self):
+        matcher = KeywordMatcher(self.buckets)
+        for text in _random_texts(2000):
+            text_lower = text.lower()
+            self.assertEqual(self.found(matcher.scan(text_lower)), self.expected(text_lower), text)
+    
+    def test_scan_reports_overlapping_keywords(self):
+        hits = KeywordMatcher(self.buckets).scan('please follow-up on the recall now')
+        self.assertEqual(hits['tags'], {'follow', 'follow-up', 'call'})
+        self.assertEqual(hits['shared'], {'call', 'now'})
+        self.assertFalse(hits['urgent'])
+    
+    def test_scan_many_matches_scan(self):
+        matcher = KeywordMatcher(self.buckets)
+        texts = [text.lower() for text in _random_texts(500)]
+        batch = matcher.scan_many(texts)
+        self.assertEqual(len(batch), len(texts))
+        for text, hits in zip(texts, batch):
+            self.assertEqual(self.found(hits), self.found(matcher.scan(text)), text)
+    
+    def test_scan_many_does_not_match_across_records(self):
+        hits = KeywordMatcher(self.buckets).scan_many(['urg', 'ent', 'as', 'ap'])
+        self.assertTrue(all(not any(result.values()) for result in hits))
+
+class JoinRecordsTests(SimpleTestCase):
+    def test_join_records(self):
+        buffer, starts = join_records(['ab', '', 'cde'])
+        self.assertEqual(buffer, RECORD_SEPARATOR.join(['ab', '', 'cde']))
+        self.assertEqual(starts, [0, 3, 4])
+        self.assertEqual(join_records([]), ('', []))
+    
+    def test_record_index_maps_every_position_to_its_record(self):
+        texts = ['first text', 'x', '', 'the last one']
+        buffer, starts = join_records(texts)
+        for index, (text, start) in enumerate(zip(texts, starts)):
+            self.assertEqual(buffer[start:start + len(text)], text)
+            for position in range(start, start + len(text)):
+                self.assertEqual(record_index(starts, position), index)
+
+class DateExtractionTests(SimpleTestCase):
+    # The patterns the single _DATE_RE alternation replaced, one findall each
+    patterns = [
+        r'\d{1,2}/\d{1,2}/\d{4}',
+        r'\d{1,2}-\d{1,2}-\d{4}',
+        r'\d{4}-\d{1,2}-\d{1,2}',
+        r'today|tomorrow|yesterday',
+        r'monday|tuesday|wednesday|thursday|friday|saturday|sunday',
+        r'next week|this week|next month',
+        r'\d{1,2}:\d{2}\s*(?:am|pm)?',
+    ]
+    
+    def test_dates_in_text_order_with_full_time_matches(self):
+        processor = ContextProcessor()
+        self.assertEqual(
+            processor.extract_dates_and_times('Call at 10:30 PM Tomorrow; due 12/31/2025 or 2025-12-31, next week'),
+            ['10:30 pm', 'tomorrow', '12/31/2025', '2025-12-31', 'next week']
+        )
+    
+    def test_same_matches_as_separate_patterns(self):
+        for text in _random_texts(2000):
+            text_lower = text.lower()
+            separate = sorted(
+                (match.start(), match.group(0))
+                for pattern in self.patterns
+                for match in re.finditer(pattern, text_lower)
+            )
+            combined = [(match.start(), match.group(0)) for match in _DATE_RE.finditer(text_lower)]
+            self.assertEqual(combined, separate, text)
+
+class ContextHeuristicsBaselineTests(SimpleTestCase):
+    def test_heuristics_match_baseline(self):
+        processor = ContextProcessor()
+        for text in _random_texts(5000):
+            self.assertEqual(processor.analyze_sentiment(text), _baseline_sentiment(text), text)
+            self.assertEqual(
+                processor.detect_priority_indicators(text), _baseline_priority_indicators(text), text
+            )
+            self.assertEqual(processor._calculate_urgency(text), _baseline_urgency(text), text)
+    
+    def test_batch_insights_match_single_entry_heuristics(self):
+        processor = ContextProcessor()
+        texts = _random_texts(300)
+        with mock.patch.object(processor.ai_client, 'aanalyze_with_ai', side_effect=RuntimeError('offline')):
+            batch = processor.process_context_batch([(text, 'EMAIL') for text in texts])
+        for text, insights in zip(texts, batch):
+            self.assertEqual(insights['sentiment_score'], _baseline_sentiment(text))
+            self.assertEqual(insights['priority_indicators'], _baseline_priority_indicators(text))
+            self.assertEqual(insights['has_deadline_mention'], _baseline_has_deadline_mention(text))
+            self.assertEqual(insights['urgency_level'], _baseline_urgency(text))
+            self.assertEqual(insights['dates_mentioned'], processor.extract_dates_and_times(text))
+    
+    def test_keywords_are_up_to_ten_meaningful_words(self):
+        processor = ContextProcessor()
+        for text in _random_texts(2000):
+            candidates = _baseline_keyword_candidates(text)
+            keywords = processor.extract_keywords(text)
+            self.assertEqual(len(keywords), len(set(keywords)))
+            self.assertTrue(set(keywords) <= candidates, text)
+            self.assertEqual(len(keywords), min(len(candidates), 10), text)
+
+class FallbackHeuristicsTests(SimpleTestCase):
+    def setUp(self):
+        self.analyzer = TaskAnalyzer()
+    
+    def test_fallbacks_match_baseline(self):
+        rng = random.Random(11)
+        texts = _random_texts(4000)
+        for title, description in zip(texts, rng.sample(texts, len(texts))):
+            priority, _ = self.analyzer._calculate_fallback_priority(title, description)
+            self.assertEqual(priority, _baseline_fallback_priority(title, description))
+            category, _ = self.analyzer._suggest_fallback_category(title, description)
+            self.assertEqual(category, _baseline_fallback_category(title, description))
+            tags, _ = self.analyzer._suggest_fallback_tags(title, description)
+            self.assertEqual(tags, _baseline_fallback_tags(title, description))
+            
+            before = datetime.now(timezone.utc)
+            deadline = self.analyzer._calculate_fallback_deadline(description)
+            days = timedelta(days=_baseline_fallback_deadline_days(description))
+            self.assertTrue(before + days <= deadline <= datetime.now(timezone.utc) + days)
+    
+    def test_confident_heuristics_skip_the_model(self):
+        with mock.patch.object(self.analyzer.ai_client, 'analyze_with_ai', return_value='0.3') as analyze:
+            self.assertEqual(self.analyzer.analyze_task_priority('Urgent: server down', ''), 0.9)
+            self.assertEqual(self.analyzer.suggest_category('Team meeting', 'discuss the roadmap'), 'Meetings')
+            analyze.assert_not_called()
+            
+            self.assertEqual(self.analyzer.analyze_task_priority('Water the plants', ''), 0.3)
+            analyze.assert_called_once()
+    
+    def test_substring_hits_are_not_confident(self):
+        for title, description in [
+            ('Fix network outage', 'Update the framework config'),
+            ('Read the following chapter', ''),
+        ]:
+            self.assertLess(self.analyzer._suggest_fallback_tags(title, description)[1], 0.8)
+        for title in ['Coordinate the product recall', 'Submit homework']:
+            self.assertLess(self.analyzer._suggest_fallback_category(title, '')[1], 0.8)
+    
+    def test_negated_or_partial_priority_keywords_are_not_confident(self):
+        for title in [
+            'Not urgent: water the plants', 'Non-critical cleanup', 'No emergency, just tidy up',
+            'This is not very urgent', 'Review the criticality matrix',
+        ]:
+            self.assertEqual(self.analyzer._calculate_fallback_priority(title, '')[0], 0.9, title)
+            self.assertLess(self.analyzer._calculate_fallback_priority(title, '')[1], 0.8, title)
+        self.assertEqual(self.analyzer._calculate_fallback_priority('Not urgent, but critical', ''), (0.9, 0.9))
+        self.assertEqual(self.analyzer._calculate_fallback_priority('Server down', 'fix ASAP'), (0.9, 0.9))
+    
+    def test_whole_word_hits_are_confident(self):
+        self.assertEqual(
+            self.analyzer._suggest_fallback_category('Team meeting', 'discuss the roadmap'),
+            ('Meetings', 0.9)
+        )
+        self.assertEqual(
+            self.analyzer._suggest_fallback_tags('Urgent project meeting', 'follow-up at the office'),
+            (['urgent', 'meeting', 'work'], 0.9)
+        )
+        self.assertLess(self.analyzer._suggest_fallback_tags('Project report', 'for work')[1], 0.8)
+
+class SemanticCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite3')
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    
+    def test_exact_hits_are_keyed_on_prompt_and_max_tokens(self):
+        cache = SemanticCache()
+        cache.set('prompt', 100, 'answer')
+        self.assertEqual(cache.get('prompt', 100), 'answer')
+        self.assertIsNone(cache.get('prompt', 50))
+        self.assertIsNone(cache.get('other prompt', 100))
+    
+    def test_similar_text_hits_within_its_namespace_only(self):
+        cache = SemanticCache()
+        cache.set('p1', 50, 'Work', ('category|Work', 'prepare the quarterly budget report for the client'))
+        similar = 'prepare the quarterly budget report for our client'
+        self.assertEqual(cache.get('p2', 50, ('category|Work', similar)), 'Work')
+        self.assertIsNone(cache.get('p2', 50, ('category|Home', similar)))
+        self.assertIsNone(cache.get('p3', 50, ('category|Work', 'buy groceries')))
+        self.assertIsNone(cache.get('p2', 50))
+    
+    def test_exact_entries_are_evicted_least_recently_used_first(self):
+        cache = SemanticCache(maxsize=2)
+        cache.set('a', 1, 'A')
+        cache.set('b', 1, 'B')
+        cache.get('a', 1)
+        cache.set('c', 1, 'C')
+        self.assertIsNone(cache.get('b', 1))
+        self.assertEqual(cache.get('a', 1), 'A')
+    
+    def test_similarity_index_is_one_lru_across_namespaces(self):
+        cache = SemanticCache(maxsize=3)
+        for index in range(5):
+            cache.set('p%d' % index, 10, str(index), ('priority|context %d' % index, 'ship the release notes'))
+        cache.get('q', 10, ('priority|context 2', 'ship the release notes'))
+        cache.set('p5', 10, '5', ('priority|context 5', 'ship the release notes'))
+        
+        self.assertEqual(len(cache._similar), 3)
+        self.assertEqual(set(cache._namespaces), {'priority|context 2', 'priority|context 4', 'priority|context 5'})
+        self.assertIsNone(cache.get('q', 10, ('priority|context 3', 'ship the release notes')))
+        self.assertEqual(cache.get('q', 10, ('priority|context 2', 'ship the release notes')), '2')
+    
+    def test_context_and_description_prompts_have_no_semantic_key(self):
+        _, context_key = ContextProcessor()._build_context_prompt('Meeting moved to Friday', 'EMAIL')
+        _, description_key = TaskAnalyzer()._build_description_prompt('Email John', '')
+        self.assertIsNone(context_key)
+        self.assertIsNone(description_key)
+    
+    def test_entries_persist_across_instances(self):
+        writer = SemanticCache(path=self.path)
+        writer.set('exact prompt', 10, 'E')
+        writer.set('tags prompt', 10, 'T', ('tags', 'plan the team offsite agenda'))
+        
+        reader = SemanticCache(path=self.path)
+        self.assertEqual(reader.get('exact prompt', 10), 'E')
+        self.assertEqual(reader.get('other', 10, ('tags', 'plan the team offsite agenda')), 'T')
+        
+        writer.set('later prompt', 10, 'L', ('tags', 'renew the car insurance policy'))
+        self.assertEqual(reader.get('other', 10, ('tags', 'renew the car insurance policy')), 'L')
+    
+    def test_only_the_newest_persisted_entries_are_loaded(self):
+        writer = SemanticCache(maxsize=2, path=self.path)
+        for index in range(4):
+            writer.set('p%d' % index, 10, str(index), ('tags|%d' % index, 'plan the team offsite agenda'))
+        
+        reader = SemanticCache(maxsize=2, path=self.path)
+        self.assertIsNone(reader.get('q', 10, ('tags|1', 'plan the team offsite agenda')))
+        self.assertEqual(reader.get('q', 10, ('tags|3', 'plan the team offsite agenda')), '3')
+        self.assertEqual(set(reader._namespaces), {'tags|2', 'tags|3'})
+    
+    def test_database_opens_on_first_use_and_again_after_fork(self):
+        cache = SemanticCache(path=self.path)
+        self.assertIsNone(cache._db)
+        cache.set('prompt', 10, 'answer')
+        parent_db = cache._db
+        self.assertIsNotNone(parent_db)
+        
+        with mock.patch('ai_module.semantic_cache.os.getpid', return_value=os.getpid() + 1):
+            self.assertEqual(cache.get('prompt', 10), 'answer')
+            cache.set('child prompt', 10, 'child answer')
+            self.assertIsNot(cache._db, parent_db)
+            self.assertIn(parent_db, cache._inherited_dbs)
+        self.assertEqual(SemanticCache(path=self.path).get('child prompt', 10), 'child answer')
+    
+    def test_unusable_path_falls_back_to_memory(self):
+        cache = SemanticCache(path=self.directory)
+        with mock.patch('builtins.print'):
+            cache.set('prompt', 10, 'answer')
+        self.assertEqual(cache.get('prompt', 10), 'answer')
+
+# How the fake LM tells prompts apart: one question about several tasks, or about one
+_BATCH_MARKERS = [
+    ('priority', 'Analyze the priority of each task'), ('deadline', 'Suggest a realistic deadline for each task'),
+    ('category', 'Suggest the most appropriate category for each task'), ('tags', 'Suggest 3-5 relevant tags for each task'),
+]
+_SINGLE_MARKERS = [
+    ('priority', 'Respond with only a decimal number'), ('deadline', 'Respond with only a number (days from now)'),
+    ('category', 'Respond with only the category name'), ('tags', 'Respond with comma-separated tags'),
+    ('description', 'Enhance this task description'),
+]
+
+class _FakeLM:
+    """Stands in for AsyncAIClient.aanalyze_with_ai, answering by the k in "Task k"
+    
+    Batched prompts get a JSON array; prompts about one task get different
+    answers, so tests can tell which path produced a value.
+    """
+    
+    def __init__(self, wrong_length=(), not_json=()):
+        self.wrong_length = set(wrong_length)
+        self.not_json = set(not_json)
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    async def __call__(self, prompt, max_tokens, cache_key=None, stop_when=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.001)
+            return self.answer(prompt)
+        finally:
+            self.in_flight -= 1
+    
+    def answer(self, prompt):
+        for kind, marker in _BATCH_MARKERS:
+            if marker in prompt:
+                numbers = [int(k) for k in re.findall(r'^\d+\. Task (\d+)\b', prompt, re.M)]
+                self.calls.append(('batch', kind, numbers))
+                if kind in self.not_json:
+                    return 'Sure! Here are the answers.'
+                answers = [
+                    {'priority': k / 10, 'deadline': k, 'category': 'group %d' % k,
+                     'tags': ['Tag%d' % k, 'batch']}[kind]
+                    for k in numbers
+                ]
+                if kind in self.wrong_length:
+                    answers = answers[:-1]
+                return 'Answers: %s' % json.dumps(answers)
+        
+        k = int(re.search(r'Task: Task (\d+)', prompt).group(1))
+        kind = next(kind for kind, marker in _SINGLE_MARKERS if marker in prompt)
+        self.calls.append(('single', kind, [k]))
+        return {
+            'priority': '0.%d5' % k, 'deadline': '%d days' % (k + 10), 'category': 'Single %d' % k,
+            'tags': 'single%d,solo' % k, 'description': 'Enhanced task %d' % k,
+        }[kind]
+
+class BatchAnalysisTests(SimpleTestCase):
+    def setUp(self):
+        self.analyzer = TaskAnalyzer()
+        # Longest description first, so grouping by length reverses the order
+        self.tasks = [
+            {'title': 'Task %d' % k, 'description': ' '.join(['details'] * (12 - k))}
+            for k in range(10)
+        ]
+    
+    def analyze(self, lm, **kwargs):
+        with mock.patch.object(self.analyzer.ai_client, 'aanalyze_with_ai', new=lm):
+            return self.analyzer.analyze_batch(self.tasks, **kwargs)
+    
+    def days_ahead(self, deadline):
+        return round((deadline - datetime.now(timezone.utc)).total_seconds() / 86400)
+    
+    def test_json_answers_come_back_in_task_order(self):
+        lm = _FakeLM()
+        analyses = self.analyze(lm)
+        
+        for k, analysis in enumerate(analyses):
+            self.assertEqual(analysis['priority_score'], k / 10)
+            self.assertEqual(self.days_ahead(analysis['suggested_deadline']), k)
+            self.assertEqual(analysis['suggested_category'], 'Group %d' % k)
+            self.assertEqual(analysis['suggested_tags'], ['tag%d' % k, 'batch'])
+            self.assertEqual(analysis['enhanced_description'], 'Enhanced task %d' % k)
+        
+        # Ten tasks are two chunks per question, grouped by description length
+        batches = [(kind, numbers) for path, kind, numbers in lm.calls if path == 'batch']
+        self.assertEqual(len(batches), 8)
+        self.assertIn(('priority', [9, 8, 7, 6, 5, 4, 3, 2]), batches)
+        self.assertIn(('priority', [1, 0]), batches)
+        self.assertEqual(
+            sorted(kind for path, kind, _ in lm.calls if path == 'single'), ['description'] * 10
+        )
+    
+    def test_wrong_length_or_unparseable_answers_are_retried_per_task(self):
+        lm = _FakeLM(wrong_length={'priority'}, not_json={'tags'})
+        analyses = self.analyze(lm)
+        
+        for k, analysis in enumerate(analyses):
+            self.assertEqual(analysis['priority_score'], float('0.%d5' % k))
+            self.assertEqual(analysis['suggested_tags'], ['single%d' % k, 'solo'])
+            self.assertEqual(analysis['suggested_category'], 'Group %d' % k)
+        
+        singles = [(kind, numbers[0]) for path, kind, numbers in lm.calls if path == 'single']
+        self.assertEqual(sorted(k for kind, k in singles if kind == 'priority'), list(range(10)))
+        self.assertEqual(sorted(k for kind, k in singles if kind == 'tags'), list(range(10)))
+        self.assertNotIn('category', [kind for kind, _ in singles])
+    
+    def test_llm_calls_in_flight_are_bounded(self):
+        lm = _FakeLM(wrong_length={'priority', 'deadline'})
+        self.analyze(lm, concurrency=3)
+        self.assertEqual(lm.max_in_flight, 3)
+        
+        lm = _FakeLM()
+        self.analyze(lm)
+        self.assertGreater(lm.max_in_flight, 3)
+    
+    def test_confident_heuristics_skip_the_batch(self):
+        self.tasks[4]['title'] = 'Task 4 is urgent'
+        lm = _FakeLM()
+        analyses = self.analyze(lm)
+        
+        self.assertEqual(analyses[4]['priority_score'], 0.9)
+        priority_tasks = [
+            k for path, kind, numbers in lm.calls if path == 'batch' and kind == 'priority' for k in numbers
+        ]
+        self.assertEqual(sorted(priority_tasks), [0, 1, 2, 3, 5, 6, 7, 8, 9])
+
+class ContextEntryQuerySetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='context-owner')
+        now = datetime.now(timezone.utc)
+        cls.report = cls.entry(['budget', 'report', 'client'], now - timedelta(days=1))
+        cls.meeting = cls.entry(['budget', 'meeting'], now - timedelta(hours=2))
+        cls.invoice = cls.entry(['client', 'invoice'], now - timedelta(hours=1))
+        cls.groceries = cls.entry(['groceries', 'milk'], now)
+    
+    @classmethod
+    def entry(cls, keywords, timestamp):
+        return ContextEntry.objects.create(
+            content=' '.join(keywords), source_type='NOTES', timestamp=timestamp,
+            keywords=keywords, user=cls.user
+        )
+    
+    def test_overlapping_keywords_ranks_by_shared_keywords_then_recency(self):
+        entries = list(ContextEntry.objects.overlapping_keywords(['budget', 'report', 'client']))
+        self.assertEqual(entries, [self.report, self.invoice, self.meeting])
+        self.assertEqual([entry.overlap_size for entry in entries], [3, 1, 1])
+        self.assertEqual(sorted(entries[0].matching_keywords), ['budget', 'client', 'report'])
+        self.assertEqual(entries[1].matching_keywords, ['client'])
+    
+    def test_overlap_works_inside_aliased_subqueries(self):
+        task = Task.objects.create(title='Quarterly budget', user=self.user)
+        TaskContextLink.objects.create(task=task, context_entry=self.meeting)
+        TaskContextLink.objects.create(task=task, context_entry=self.groceries)
+        shared = ContextEntry.objects.overlapping_keywords(['budget']).filter(overlap_size__gt=0)
+        self.assertEqual(
+            list(TaskContextLink.objects.filter(context_entry__in=shared).values_list('context_entry', flat=True)),
+            [self.meeting.id]
+        )
+    
+    def test_relevant_to_applies_threshold_and_limit(self):
+        keywords = ['budget', 'report'] + ['filler%d' % index for index in range(8)]
+        relevant = ContextEntry.objects.relevant_to(keywords)
+        self.assertEqual([match['context'] for match in relevant], [self.report.as_context_data()])
+        self.assertEqual(relevant[0]['relevance_score'], 0.2)
+        self.assertEqual(sorted(relevant[0]['matching_keywords']), ['budget', 'report'])
+        
+        self.assertEqual(len(ContextEntry.objects.relevant_to(['budget', 'client'], limit=2)), 2)
+        self.assertEqual(ContextEntry.objects.relevant_to([]), [])
+
+class InsightsSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='insights-owner')
+        now = datetime.now(timezone.utc)
+        for keywords, source_type, urgency, sentiment in [
+            (['budget', 'report'], 'EMAIL', 8, 0.2),
+            (['budget', 'client'], 'EMAIL', 3, 0.6),
+            (['zoo', 'report', 'budget'], 'NOTES', 7, 0.7),
+        ]:
+            ContextEntry.objects.create(
+                content=' '.join(keywords), source_type=source_type, timestamp=now, keywords=keywords,
+                processed_insights={'urgency_level': urgency}, sentiment_score=sentiment, user=user
+            )
+        stale = ContextEntry.objects.create(
+            content='budget', source_type='NOTES', timestamp=now - timedelta(days=60),
+            keywords=['budget'], processed_insights={'urgency_level': 9}, user=user
+        )
+        ContextEntry.objects.filter(pk=stale.pk).update(created_at=now - timedelta(days=60))
+    
+    def test_tallies_keywords_and_urgency_of_recent_entries(self):
+        response = APIClient(SERVER_NAME='localhost').get('/api/contexts/insights_summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_entries'], 3)
+        self.assertAlmostEqual(response.data['average_sentiment'], 0.5)
+        self.assertEqual(response.data['high_priority_entries'], 2)
+        self.assertEqual(
+            response.data['common_keywords'],
+            [('budget', 3), ('report', 2), ('client', 1), ('zoo', 1)]
+        )
+        self.assertEqual(
+            sorted((row['source_type'], row['count']) for row in response.data['source_distribution']),
+            [('EMAIL', 2), ('NOTES', 1)]
+        )
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AIAnalysisCacheTests(TestCase):
+    analysis = {
+        'priority_score': 0.7,
+        'suggested_deadline': datetime(2030, 1, 1, tzinfo=timezone.utc),
+        'suggested_category': 'Work',
+        'suggested_tags': ['work'],
+        'enhanced_description': 'Prepare the quarterly report',
+        'relevant_contexts': [],
+        'analysis_timestamp': '2030-01-01T00:00:00+00:00',
+    }
+    
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient(SERVER_NAME='localhost')
+        patcher = mock.patch.object(TaskAnalyzer, 'get_comprehensive_task_analysis', return_value=self.analysis)
+        self.analyze = patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def post(self, title, workload=5):
+        return self.api.post(
+            '/api/tasks/ai_analysis/',
+            {'task_title': title, 'task_description': 'for the client', 'current_workload': workload},
+            format='json'
+        )
+    
+    def test_identical_requests_share_one_analysis(self):
+        first = self.post('Quarterly report')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data['suggested_deadline'], '2030-01-01T00:00:00+00:00')
+        self.assertEqual(self.post('Quarterly report').data, first.data)
+        self.assertEqual(self.analyze.call_count, 1)
+        
+        self.post('Quarterly report', workload=8)
+        self.post('Weekly report')
+        self.assertEqual(self.analyze.call_count, 3)
+    
+    def test_context_changes_invalidate_cached_analyses(self):
+        self.post('Quarterly report')
+        ContextEntry.objects.create(
+            content='The client moved the deadline', source_type='EMAIL',
+            timestamp=datetime.now(timezone.utc), user=User.objects.create(username='sender')
+        )
+        self.post('Quarterly report')
+        self.assertEqual(self.analyze.call_count, 2)
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SuggestedCategoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+    
+    def test_missing_category_is_created_once(self):
+        category_id = _suggested_category_id({'suggested_category': 'Errands'})
+        self.assertEqual(Category.objects.get(name='Errands').id, category_id)
+        
+        cache.clear()
+        self.assertEqual(_suggested_category_id({'suggested_category': 'Errands'}), category_id)
+        self.assertEqual(Category.objects.filter(name='Errands').count(), 1)
+    
+    def test_cached_id_skips_the_database(self):
+        category = Category.objects.create(name='Work')
+        self.assertEqual(_suggested_category_id({'suggested_category': 'Work'}), category.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(_suggested_category_id({'suggested_category': 'Work'}), category.id)
+        self.assertIsNone(_suggested_category_id({'suggested_category': ''}))
+    
+    def test_deleted_category_is_evicted(self):
+        category = Category.objects.create(name='Work')
+        _suggested_category_id({'suggested_category': 'Work'})
+        category.delete()
+        self.assertNotEqual(_suggested_category_id({'suggested_category': 'Work'}), category.id)
+    
+    def test_only_new_categories_invalidate_cached_analyses(self):
+        category = Category.objects.create(name='Work')
+        version = context_version()
+        self.assertEqual(_suggested_category_id({'suggested_category': 'Work'}), category.id)
+        self.assertEqual(context_version(), version)
+        
+        _suggested_category_id({'suggested_category': 'Errands'})
+        self.assertGreater(context_version(), version)
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TaskListCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='task-owner')
+        cls.tasks = [Task.objects.create(title='Task %d' % index, user=cls.user) for index in range(3)]
+    
+    def setUp(self):
+        cache.clear()
+    
+    def render(self):
+        """Rendered task list and the ids of the tasks that were not cached"""
+        original = TaskSerializer.to_representation
+        with mock.patch.object(TaskSerializer, 'to_representation', autospec=True, side_effect=original) as render_task:
+            data = TaskSerializer(Task.objects.order_by('pk'), many=True).data
+        return data, [call.args[1].pk for call in render_task.call_args_list]
+    
+    def test_unchanged_tasks_are_rendered_once(self):
+        first, rendered = self.render()
+        self.assertEqual(rendered, [task.pk for task in self.tasks])
+        self.assertEqual(self.render(), (first, []))
+    
+    def test_edits_and_context_changes_render_again(self):
+        self.render()
+        task = self.tasks[1]
+        task.title = 'Renamed'
+        task.save()
+        data, rendered = self.render()
+        self.assertEqual(rendered, [task.pk])
+        self.assertEqual(data[1]['title'], 'Renamed')
+        
+        ContextEntry.objects.create(
+            content='New context', source_type='NOTES',
+            timestamp=datetime.now(timezone.utc), user=self.user
+        )
+        self.assertEqual(self.render()[1], [task.pk for task in self.tasks])
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ReanalyzeTaskTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='task-owner')
+        cls.task = Task.objects.create(title='Prepare report', user=user)
+        cls.budget, cls.feedback = [
+            ContextEntry.objects.create(
+                content=content, source_type='NOTES', timestamp=datetime.now(timezone.utc), user=user
+            )
+            for content in ['Budget numbers are in', 'Client feedback on the draft']
+        ]
+    
+    def setUp(self):
+        cache.clear()
+    
+    def reanalyze(self, relevant):
+        """Run reanalyze_task with these (entry id, score) matches and return its links"""
+        analysis = {
+            'priority_score': 0.8,
+            'suggested_deadline': datetime(2030, 1, 1, tzinfo=timezone.utc),
+            'suggested_category': 'Work',
+            'suggested_tags': ['work', 'report'],
+            'enhanced_description': 'Prepare the quarterly report',
+            'relevant_contexts': [
+                {'context': {'id': entry_id}, 'relevance_score': score} for entry_id, score in relevant
+            ],
+        }
+        with mock.patch('tasks.celery_tasks._analyze_task', return_value=analysis):
+            reanalyze_task.apply(args=(self.task.id,)).get()
+        return dict(TaskContextLink.objects.filter(task=self.task).values_list('context_entry_id', 'relevance_score'))
+    
+    def test_links_existing_contexts_and_updates_scores(self):
+        TaskContextLink.objects.create(task=self.task, context_entry=self.feedback, relevance_score=0.1)
+        links = self.reanalyze([(self.budget.id, 0.5), (self.feedback.id, 0.3), (0, 0.9)])
+        self.assertEqual(links, {self.budget.id: 0.5, self.feedback.id: 0.3})
+        
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.ai_priority_score, 0.8)
+        self.assertEqual(self.task.ai_suggested_tags, 'work,report')
+        self.assertEqual(self.task.category.name, 'Work')
+    
+    def test_no_relevant_contexts_leaves_links_alone(self):
+        TaskContextLink.objects.create(task=self.task, context_entry=self.budget, relevance_score=0.4)
+        self.assertEqual(self.reanalyze([]), {self.budget.id: 0.4})
+
+@skipUnless(settings.CELERY_TASK_ALWAYS_EAGER, 'needs CELERY_TASK_ALWAYS_EAGER=True')
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class EagerAnalysisStatusTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient(SERVER_NAME='localhost')
+        self.user = User.objects.create(id=1, username='owner')
+    
+    def status(self, job_id):
+        response = self.api.get('/api/tasks/analysis_status/%s/' % job_id)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+    
+    def test_reanalyze_job_reports_its_result(self):
+        task = Task.objects.create(title='Prepare report', user=self.user)
+        analysis = {
+            'priority_score': 0.8,
+            'suggested_deadline': datetime(2030, 1, 1, tzinfo=timezone.utc),
+            'suggested_category': '',
+            'suggested_tags': ['report'],
+            'enhanced_description': 'Prepare the quarterly report',
+            'relevant_contexts': [],
+        }
+        with mock.patch('tasks.celery_tasks._analyze_task', return_value=analysis):
+            response = self.api.post('/api/tasks/%d/reanalyze/' % task.id)
+        self.assertEqual(response.status_code, 202)
+        
+        job_id = response.data['analysis_job_id']
+        self.assertEqual(
+            self.status(job_id),
+            {'job_id': job_id, 'state': 'SUCCESS', 'task_id': task.id, 'priority_score': 0.8}
+        )
+    
+    def test_bulk_import_reports_every_batch(self):
+        entries = [
+            {'content': 'Budget review %d moved to Friday' % index, 'source_type': 'EMAIL',
+             'timestamp': '2030-01-01T09:00:00Z'}
+            for index in range(CONTEXT_BATCH_SIZE + 1)
+        ]
+        with mock.patch.object(AsyncAIClient, 'aanalyze_with_ai', side_effect=RuntimeError('offline')):
+            response = self.api.post('/api/contexts/bulk_create/', entries, format='json')
+        self.assertEqual(response.status_code, 202)
+        
+        job_id = response.data['analysis_job_id']
+        self.assertEqual(
+            self.status(job_id),
+            {'job_id': job_id, 'state': 'SUCCESS', 'completed': 2, 'total': 2}
+        )
+        self.assertEqual(ContextEntry.objects.exclude(keywords=[]).count(), CONTEXT_BATCH_SIZE + 1)    
+    def test_bulk_reanalyze_batches_open_tasks(self):
+        tasks = [Task.objects.create(title='Task %d' % k, user=self.user) for k in range(3)]
+        done = Task.objects.create(title='Task 9', status='COMPLETED', user=self.user)
+        with mock.patch.object(AsyncAIClient, 'aanalyze_with_ai', new=_FakeLM()):
+            response = self.api.post('/api/tasks/bulk_reanalyze/', {}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(sorted(response.data['task_ids']), [task.id for task in tasks])
+        
+        job_id = response.data['analysis_job_id']
+        self.assertEqual(
+            self.status(job_id),
+            {'job_id': job_id, 'state': 'SUCCESS', 'completed': 1, 'total': 1}
+        )
+        for k, task in enumerate(tasks):
+            task.refresh_from_db()
+            self.assertEqual(task.ai_priority_score, k / 10)
+            self.assertEqual(task.ai_suggested_tags, 'tag%d,batch' % k)
+            self.assertEqual(task.category.name, 'Group %d' % k)
+            self.assertEqual(task.description, 'Enhanced task %d' % k)
+        done.refresh_from_db()
+        self.assertEqual(done.ai_priority_score, 0.5)
+    
+    def test_bulk_reanalyze_takes_task_ids(self):
+        task = Task.objects.create(title='Task 2', status='COMPLETED', user=self.user)
+        with mock.patch.object(AsyncAIClient, 'aanalyze_with_ai', new=_FakeLM()):
+            response = self.api.post('/api/tasks/bulk_reanalyze/', {'task_ids': [task.id]}, format='json')
+        self.assertEqual(response.data['task_ids'], [task.id])
+        task.refresh_from_db()
+        self.assertEqual(task.ai_priority_score, 0.2)
+        
+        response = self.api.post('/api/tasks/bulk_reanalyze/', {'task_ids': 'all'}, format='json')
+        self.assertEqual(response.status_code, 400)
\ No newline at end of file
@@ -1,15 +1,27 @@
+import hashlib
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q, Count
-from datetime import datetime, timedelta
-from .models import Task, Category, ContextEntry, TaskContextLink
+from rest_framework.pagination import CursorPagination
+from celery.result import AsyncResult, GroupResult
+from drf_auto_query import prefetch_queryset_for_serializer
+from django.core.cache import cache
+from django.db.models import Q, F, Func, Count, Avg
+from django.utils import timezone
+from datetime import datetime
+from .models import Task, Category, ContextEntry
 from .serializers import (
     TaskSerializer, TaskCreateSerializer, CategorySerializer,
     ContextEntrySerializer, TaskAIAnalysisSerializer
 )
-from ai_module.task_analyzer import TaskAnalyzer
-from ai_module.context_processor import ContextProcessor
+from .celery_tasks import (
+    reanalyze_task, process_context, dispatch_context_batches, dispatch_task_batches
+)
+from .signals import context_version, bump_context_version
+from ai_module.task_analyzer import get_task_analyzer
+
+# How long an ai_analysis response is reused for identical input
+AI_ANALYSIS_CACHE_SECONDS = 600
 
 class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.all()
@@ -29,9 +41,9 @@ class TaskViewSet(viewsets.ModelViewSet):
         return TaskSerializer
     
     def get_queryset(self):
-        queryset = Task.objects.select_related('category').prefetch_related(
-            'taskcontextlink_set__context_entry'
-        )
+        # Joins and prefetches follow the serializer's fields, so nested fields added
+        # later are loaded up front instead of one query per row
+        queryset = prefetch_queryset_for_serializer(Task.objects.all(), self.get_serializer_class())
         
         # Filter by status
         status_filter = self.request.query_params.get('status')
@@ -65,30 +77,36 @@ class TaskViewSet(viewsets.ModelViewSet):
         if serializer.is_valid():
             data = serializer.validated_data
             
+            # Identical requests share one analysis until the context changes
+            cache_key = 'ai:analysis:' + hashlib.sha256(
+                f"{data['task_title']}|{data['task_description']}|"
+                f"{data['current_workload']}|{context_version()}".encode('utf-8')
+            ).hexdigest()
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return Response(cached)
+            
             # Get recent context for analysis
-            recent_contexts = ContextEntry.objects.filter(
-                created_at__gte=datetime.now() - timedelta(days=7)
-            )
-            context_data = []
-            for ctx in recent_contexts:
-                context_data.append({
-                    'content': ctx.content,
-                    'keywords': ctx.keywords.split(',') if ctx.keywords else [],
-                    'urgency_level': ctx.processed_insights.get('urgency_level', 1),
-                    'sentiment_score': ctx.sentiment_score or 0.5
-                })
+            recent_contexts = ContextEntry.objects.recent()
+            context_data = recent_contexts.context_data()
             
             # Get existing categories
             existing_categories = list(Category.objects.values_list('name', flat=True))
             
             # Run AI analysis
-            analyzer = TaskAnalyzer()
+            analyzer = get_task_analyzer()
+            relevant_contexts = recent_contexts.relevant_to(
+                analyzer.context_processor.extract_keywords(
+                    f"{data['task_title']} {data['task_description']}"
+                )
+            )
             analysis = analyzer.get_comprehensive_task_analysis(
                 data['task_title'],
                 data['task_description'],
                 context_data,
                 existing_categories,
-                data['current_workload']
+                data['current_workload'],
+                relevant_contexts=relevant_contexts
             )
             
             # Format response
@@ -102,6 +120,7 @@ class TaskViewSet(viewsets.ModelViewSet):
                 'relevant_contexts_count': len(analysis['relevant_contexts']),
                 'analysis_timestamp': analysis['analysis_timestamp']
             }
+            cache.set(cache_key, response_data, AI_ANALYSIS_CACHE_SECONDS)
             
             return Response(response_data)
         
@@ -111,78 +130,79 @@ class TaskViewSet(viewsets.ModelViewSet):
     def reanalyze(self, request, pk=None):
         """Re-run AI analysis on existing task"""
         task = self.get_object()
-        
-        # Get recent context
-        recent_contexts = ContextEntry.objects.filter(
-            created_at__gte=datetime.now() - timedelta(days=7)
+        job = reanalyze_task.delay(task.id)
+        return Response(
+            {'task_id': task.id, 'analysis_job_id': job.id},
+            status=status.HTTP_202_ACCEPTED
         )
-        context_data = []
-        for ctx in recent_contexts:
-            context_data.append({
-                'content': ctx.content,
-                'keywords': ctx.keywords.split(',') if ctx.keywords else [],
-                'urgency_level': ctx.processed_insights.get('urgency_level', 1),
-                'sentiment_score': ctx.sentiment_score or 0.5
-            })
-        
-        # Get existing categories
-        existing_categories = list(Category.objects.values_list('name', flat=True))
-        
-        # Run AI analysis
-        analyzer = TaskAnalyzer()
-        analysis = analyzer.get_comprehensive_task_analysis(
-            task.title,
-            task.original_description or task.description,
-            context_data,
-            existing_categories
-        )
-        
-        # Update task with new analysis
-        task.ai_priority_score = analysis['priority_score']
-        task.ai_suggested_deadline = analysis['suggested_deadline']
-        task.ai_suggested_tags = ','.join(analysis['suggested_tags'])
-        task.description = analysis['enhanced_description']
-        task.context_based_notes = f"Re-analyzed on {datetime.now().strftime('%Y-%m-%d %H:%M')}: " \
-                                  f"Priority {analysis['priority_score']:.2f}"
-        
-        # Update category if suggested
-        if analysis['suggested_category']:
-            category, created = Category.objects.get_or_create(
-                name=analysis['suggested_category'],
-                defaults={'color': '#3B82F6'}
+    
+    @action(detail=False, methods=['post'])
+    def bulk_reanalyze(self, request):
+        """Re-run AI analysis on many tasks with batched prompts, by default every open task"""
+        task_ids = request.data.get('task_ids') if isinstance(request.data, dict) else None
+        tasks = Task.objects.all()
+        if task_ids is None:
+            tasks = tasks.filter(status__in=['TODO', 'IN_PROGRESS'])
+        elif isinstance(task_ids, list) and all(isinstance(task_id, int) for task_id in task_ids):
+            tasks = tasks.filter(id__in=task_ids)
+        else:
+            return Response(
+                {'error': 'Expected task_ids to be a list of task ids'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            task.category = category
-        
-        task.save()
-        
-        # Link relevant contexts
-        for rel_ctx in analysis['relevant_contexts']:
-            try:
-                context_entry = ContextEntry.objects.get(
-                    id=rel_ctx['context']['id']
-                )
-                TaskContextLink.objects.update_or_create(
-                    task=task,
-                    context_entry=context_entry,
-                    defaults={'relevance_score': rel_ctx['relevance_score']}
-                )
-            except ContextEntry.DoesNotExist:
-                continue
+        task_ids = list(tasks.values_list('id', flat=True))
+        
+        job_id = None
+        if task_ids:
+            job_id = dispatch_task_batches(task_ids).id
+        return Response(
+            {'task_ids': task_ids, 'analysis_job_id': job_id},
+            status=status.HTTP_202_ACCEPTED
+        )
+    
+    @action(detail=False, methods=['get'], url_path=r'analysis_status/(?P<job_id>[^/.]+)')
+    def analysis_status(self, request, job_id=None):
+        """Poll a background AI analysis job"""
+        group_result = GroupResult.restore(job_id)
+        if group_result is not None:
+            # A bulk import or re-analysis fanned out over several jobs
+            if group_result.successful():
+                state = 'SUCCESS'
+            elif group_result.failed():
+                state = 'FAILURE'
+            else:
+                state = 'PROGRESS'
+            return Response({
+                'job_id': job_id,
+                'state': state,
+                'completed': group_result.completed_count(),
+                'total': len(group_result)
+            })
         
-        serializer = self.get_serializer(task)
-        return Response(serializer.data)
+        result = AsyncResult(job_id)
+        data = {'job_id': job_id, 'state': result.state}
+        if isinstance(result.info, dict):
+            data.update(result.info)  # Progress meta or the job's return value
+        elif result.failed():
+            data['error'] = str(result.info)
+        return Response(data)
     
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Get task statistics"""
-        total_tasks = Task.objects.count()
-        completed_tasks = Task.objects.filter(status='COMPLETED').count()
-        pending_tasks = Task.objects.filter(status__in=['TODO', 'IN_PROGRESS']).count()
-        high_priority_tasks = Task.objects.filter(ai_priority_score__gte=0.7).count()
-        overdue_tasks = Task.objects.filter(
-            deadline__lt=datetime.now(),
-            status__in=['TODO', 'IN_PROGRESS']
-        ).count()
+        # All task counts in one query with conditional aggregation
+        open_statuses = ['TODO', 'IN_PROGRESS']
+        counts = Task.objects.aggregate(
+            total_tasks=Count('id'),
+            completed_tasks=Count('id', filter=Q(status='COMPLETED')),
+            pending_tasks=Count('id', filter=Q(status__in=open_statuses)),
+            high_priority_tasks=Count('id', filter=Q(ai_priority_score__gte=0.7)),
+            overdue_tasks=Count('id', filter=Q(
+                deadline__lt=timezone.now(), status__in=open_statuses
+            ))
+        )
+        total_tasks = counts['total_tasks']
+        completed_tasks = counts['completed_tasks']
         
         # Category distribution
         category_stats = Category.objects.annotate(
@@ -192,9 +212,9 @@ class TaskViewSet(viewsets.ModelViewSet):
         return Response({
             'total_tasks': total_tasks,
             'completed_tasks': completed_tasks,
-            'pending_tasks': pending_tasks,
-            'high_priority_tasks': high_priority_tasks,
-            'overdue_tasks': overdue_tasks,
+            'pending_tasks': counts['pending_tasks'],
+            'high_priority_tasks': counts['high_priority_tasks'],
+            'overdue_tasks': counts['overdue_tasks'],
             'completion_rate': (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0,
             'category_distribution': list(category_stats)
         })
@@ -210,9 +230,18 @@ class TaskViewSet(viewsets.ModelViewSet):
         else:
             return 'LOW'
 
+class ContextEntryCursorPagination(CursorPagination):
+    """Keyset pages over the context feed, newest first
+
+    Each page seeks from the previous page's last timestamp instead of
+    counting and skipping earlier rows, so deep pages cost the same as the first.
+    """
+    ordering = '-timestamp'
+
 class ContextEntryViewSet(viewsets.ModelViewSet):
     queryset = ContextEntry.objects.all()
     serializer_class = ContextEntrySerializer
+    pagination_class = ContextEntryCursorPagination
     
     def get_queryset(self):
         queryset = ContextEntry.objects.all()
@@ -246,19 +275,8 @@ class ContextEntryViewSet(viewsets.ModelViewSet):
         """Process context entry with AI when created"""
         context_entry = serializer.save()
         
-        # Process with AI
-        processor = ContextProcessor()
-        insights = processor.process_context_entry(
-            context_entry.content,
-            context_entry.source_type
-        )
-        
-        # Update the entry with processed insights
-        context_entry.processed_insights = insights
-        context_entry.keywords = ','.join(insights['keywords'])
-        context_entry.sentiment_score = insights['sentiment_score']
-        context_entry.priority_indicators = insights['priority_indicators']
-        context_entry.save()
+        # Process with AI on a Celery worker
+        context_entry.analysis_job_id = process_context.delay(context_entry.id).id
     
     @action(detail=False, methods=['post'])
     def bulk_create(self, request):
@@ -269,68 +287,61 @@ class ContextEntryViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        created_entries = []
-        processor = ContextProcessor()
-        
+        valid_entries = []
         for entry_data in request.data:
             serializer = self.get_serializer(data=entry_data)
             if serializer.is_valid():
-                context_entry = serializer.save()
-                
-                # Process with AI
-                insights = processor.process_context_entry(
-                    context_entry.content,
-                    context_entry.source_type
-                )
-                
-                # Update with insights
-                context_entry.processed_insights = insights
-                context_entry.keywords = ','.join(insights['keywords'])
-                context_entry.sentiment_score = insights['sentiment_score']
-                context_entry.priority_indicators = insights['priority_indicators']
-                context_entry.save()
-                
-                created_entries.append(context_entry)
+                valid_entries.append(serializer.validated_data)
+        
+        # Save every entry in a single query, then process them on the workers
+        created_entries = ContextEntry.objects.bulk_create([
+            ContextEntry(**data) for data in valid_entries
+        ])
+        bump_context_version()
+        
+        job_id = None
+        if created_entries:
+            job_id = dispatch_context_batches([entry.id for entry in created_entries]).id
         
         serializer = self.get_serializer(created_entries, many=True)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(
+            {'analysis_job_id': job_id, 'entries': serializer.data},
+            status=status.HTTP_202_ACCEPTED
+        )
     
     @action(detail=False, methods=['get'])
     def insights_summary(self, request):
         """Get summary of context insights"""
         # Get recent context entries (last 30 days)
-        recent_contexts = ContextEntry.objects.filter(
-            created_at__gte=datetime.now() - timedelta(days=30)
+        recent_contexts = ContextEntry.objects.recent(days=30)
+        
+        # Count, average sentiment and high-urgency entries in one query
+        summary = recent_contexts.aggregate(
+            total_entries=Count('id'),
+            avg_sentiment=Avg('sentiment_score'),
+            high_priority_count=Count(
+                'id', filter=Q(processed_insights__urgency_level__gt=6)
+            )
         )
-        
-        total_entries = recent_contexts.count()
+        total_entries = summary['total_entries']
         if total_entries == 0:
             return Response({'message': 'No recent context entries found'})
         
-        # Calculate averages and distributions
-        avg_sentiment = recent_contexts.aggregate(
-            avg_sentiment=models.Avg('sentiment_score')
-        )['avg_sentiment'] or 0.5
+        avg_sentiment = summary['avg_sentiment'] or 0.5
+        high_priority_count = summary['high_priority_count']
         
         # Source type distribution
         source_distribution = recent_contexts.values('source_type').annotate(
             count=Count('id')
         )
         
-        # Most common keywords
-        all_keywords = []
-        for entry in recent_contexts:
-            if entry.keywords:
-                all_keywords.extend(entry.keywords.split(','))
-        
-        from collections import Counter
-        common_keywords = Counter(all_keywords).most_common(10)
-        
-        # High priority entries
-        high_priority_count = sum(
-            1 for entry in recent_contexts
-            if entry.processed_insights.get('urgency_level', 1) > 6
-        )
+        # Most common keywords, tallied in SQL by unnesting the keyword arrays
+        keyword_counts = recent_contexts.annotate(
+            keyword=Func(F('keywords'), function='unnest')
+        ).values('keyword').annotate(
+            count=Count('*')
+        ).order_by('-count', 'keyword')[:10]
+        common_keywords = [(row['keyword'], row['count']) for row in keyword_counts]
         
         return Response({
             'total_entries': total_entries,